@@ -1,71 +1,109 @@
+import os
 import sqlite3
+import threading
+from collections import deque
+from contextlib import contextmanager
 
-DATABASE = "fyp_database.db"
+from config import get_setting
+
+DATABASE = get_setting("DATABASE_PATH", "fyp_database.db")
+POOL_SIZE = get_setting("DATABASE_POOL_SIZE", 8, int)
+BUSY_TIMEOUT_MS = 5000
+
+# Applied to every connection. WAL lets readers run concurrently with the grading writer.
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode = WAL",
+    "PRAGMA synchronous = NORMAL",
+    "PRAGMA cache_size = -20000",  # 20 MB page cache
+    "PRAGMA mmap_size = 268435456",  # 256 MB memory-mapped I/O
+    f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}",
+    "PRAGMA temp_store = MEMORY",
+)
 
 def get_db_connection():
     """Creates and returns a database connection."""
-    conn = sqlite3.connect(DATABASE)
+    conn = sqlite3.connect(DATABASE, timeout=BUSY_TIMEOUT_MS / 1000, check_same_thread=False)
     conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
     return conn
-  
-def initialize_database():
-    """Creates necessary tables if they don’t exist."""
-    conn = get_db_connection()
-    cursor = conn.cursor()
 
-    cursor.executescript("""
-    CREATE TABLE IF NOT EXISTS User (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        email TEXT UNIQUE NOT NULL,
-        password TEXT NOT NULL,
-        last_name TEXT NOT NULL,
-        other_names TEXT NOT NULL,
-        user_type TEXT CHECK(user_type IN ('student', 'teacher')) NOT NULL,
-        matric_number TEXT UNIQUE DEFAULT NULL,
-        title TEXT DEFAULT NULL,
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
-    );
+class ConnectionPool:
+    """
+    Thread-safe pool of database connections, shared by all sessions in a process.
+
+    When every connection is busy, waiting threads are served first come, first served,
+    so a writer is not starved by readers that keep returning and re-borrowing connections.
+    """
 
-    CREATE TABLE IF NOT EXISTS Tests (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        teacher_id INTEGER NOT NULL,
-        test_code TEXT UNIQUE NOT NULL,
-        title TEXT NOT NULL,
-        description TEXT,
-        strict INTEGER DEFAULT 0,
-        questions_data TEXT NOT NULL, -- JSON format
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (teacher_id) REFERENCES User(id) ON DELETE CASCADE
-    );
+    def __init__(self, size=POOL_SIZE):
+        self.size = size
+        self._idle = []
+        self._waiters = deque()
+        self._created = 0
+        self._lock = threading.Lock()
 
-    CREATE TABLE IF NOT EXISTS Student_Test (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        test_id INTEGER NOT NULL,
-        student_id INTEGER NOT NULL,
-        answers TEXT NOT NULL, -- JSON format
-        result TEXT DEFAULT NULL, -- JSON format
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (test_id) REFERENCES Tests(id) ON DELETE CASCADE,
-        FOREIGN KEY (student_id) REFERENCES User(id) ON DELETE CASCADE,
-        UNIQUE(test_id, student_id) -- Ensures one entry per student per test
-    );
-                         
-    CREATE TABLE IF NOT EXISTS Rubrics (
-        id INTEGER PRIMARY KEY AUTOINCREMENT,
-        teacher_id INTEGER NOT NULL,
-        title TEXT NOT NULL,
-        rubric_data TEXT NOT NULL, -- JSON format
-        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-        FOREIGN KEY (teacher_id) REFERENCES User(id) ON DELETE CASCADE
-    );
-    """)
+    def _acquire(self):
+        while True:
+            with self._lock:
+                if self._idle and not self._waiters:
+                    return self._idle.pop()
+                if self._created < self.size:
+                    self._created += 1
+                    create = True
+                else:
+                    create = False
+                    waiter = [threading.Event(), None]
+                    self._waiters.append(waiter)
+            if create:
+                try:
+                    return get_db_connection()
+                except Exception:
+                    self._discard_slot()
+                    raise
+            waiter[0].wait()
+            if waiter[1] is not None:
+                return waiter[1]
+            # Woken without a connection: a failed connect freed a slot, so try to open one
 
-    conn.commit()
-    conn.close()
+    def _discard_slot(self):
+        """Frees the slot of a connection that could not be opened, waking the first waiter to retry."""
+        with self._lock:
+            self._created -= 1
+            if self._waiters:
+                self._waiters.popleft()[0].set()
 
-# Auto-run database initialization when the module is imported
-initialize_database()
+    def _release(self, conn):
+        with self._lock:
+            if self._waiters:
+                waiter = self._waiters.popleft()
+                waiter[1] = conn
+                waiter[0].set()
+            else:
+                self._idle.append(conn)
+
+    @contextmanager
+    def connection(self):
+        """Borrows a connection for the duration of the block."""
+        conn = self._acquire()
+        try:
+            yield conn
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            self._release(conn)
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+def get_pool():
+    """Returns this process's connection pool, creating it on first use."""
+    global _pool, _pool_pid
+    with _pool_lock:
+        if _pool is None or _pool_pid != os.getpid():
+            _pool = ConnectionPool()
+            _pool_pid = os.getpid()
+        return _pool
+  
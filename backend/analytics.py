@@ -0,0 +1,55 @@
+# ================================
+# Backend Analytics Functions
+# ================================
+from backend.query import execute_query, execute_many
+
+def get_question_score_rows(test_id):
+    """(submission_id, question_id, score) for every graded question of a test."""
+    return execute_query(
+        "SELECT submission_id, question_id, score FROM Question_Score WHERE test_id = ?",
+        (test_id,), fetchall=True
+    )
+
+def get_criterion_pass_rates(test_id):
+    """
+    (rubric, question_id, criterion_index, evaluations, pass rate) for every criterion of every question
+    of a test. Criteria are only comparable within a rubric, so rates are kept apart per rubric fingerprint.
+    """
+    query = """
+        SELECT q.rubric, q.question_id, c.criterion_index, COUNT(*), AVG(c.binary_score)
+        FROM Question_Score q
+        JOIN Criterion_Score c ON c.submission_id = q.submission_id AND c.question_id = q.question_id
+        WHERE q.test_id = ?
+        GROUP BY q.rubric, q.question_id, c.criterion_index
+    """
+    return execute_query(query, (test_id,), fetchall=True)
+
+def get_stored_statistics(test_id):
+    """
+    Returns (version, statistics JSON) for a test. The JSON is None when the statistics were never
+    computed or results were saved since; the version changes with every save.
+    """
+    result = execute_query("SELECT version, stats FROM Test_Statistics WHERE test_id = ?", (test_id,), fetchone=True)
+    return tuple(result) if result else (0, None)
+
+def store_statistics(test_id, version, stats_json):
+    """Store computed statistics, unless results were saved after `version` was read."""
+    execute_query(
+        """
+        INSERT INTO Test_Statistics (test_id, version, stats, computed_at)
+        VALUES (?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(test_id) DO UPDATE SET stats = excluded.stats, computed_at = excluded.computed_at
+        WHERE Test_Statistics.version = excluded.version
+        """,
+        (test_id, version, stats_json), commit=True
+    )
+
+def mark_statistics_stale(test_ids, conn=None):
+    """Invalidate the stored statistics of the given tests; called whenever their results change."""
+    execute_many(
+        """
+        INSERT INTO Test_Statistics (test_id, version, stats) VALUES (?, 1, NULL)
+        ON CONFLICT(test_id) DO UPDATE SET version = version + 1, stats = NULL
+        """,
+        [(test_id,) for test_id in set(test_ids)], conn
+    )
@@ -0,0 +1,70 @@
+"""
+Read-through cache for the queries every Streamlit rerun repeats.
+
+Functions decorated with @cached(namespace) keep their results in memory, shared
+by all sessions of the process, until the entry is older than the namespace's
+TTL or the namespace is invalidated by a write (see invalidate()). Callers get
+their own copy of a cached value, so mutating it does not affect the cache.
+
+Writes made by other processes (e.g. grading workers saving results) are not
+seen until the entry expires, which is why results use a short TTL.
+"""
+import copy
+import functools
+import threading
+import time
+
+from config import get_setting
+
+DEFAULT_TTL = get_setting("DATA_CACHE_TTL", 300, float)
+RESULTS_TTL = get_setting("DATA_CACHE_RESULTS_TTL", 10, float)
+MAX_ENTRIES = get_setting("DATA_CACHE_MAX_ENTRIES", 10000, int)
+
+_entries = {}  # (namespace, function, args) -> (expires_at, value)
+_generations = {}  # namespace (None for all of them) -> number of times it was invalidated
+_lock = threading.Lock()
+_stats = {"hits": 0, "misses": 0}
+
+
+def cached(namespace: str, ttl: float = None):
+    """Caches a query function's results per argument tuple under namespace."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            key = (namespace, func.__qualname__, args, tuple(sorted(kwargs.items())))
+            now = time.monotonic()
+            with _lock:
+                entry = _entries.get(key)
+                if entry is not None and entry[0] > now:
+                    _stats["hits"] += 1
+                    return copy.deepcopy(entry[1])
+                _stats["misses"] += 1
+                generation = (_generations.get(None, 0), _generations.get(namespace, 0))
+
+            value = func(*args, **kwargs)
+            with _lock:
+                # An invalidation during the call means the value may already be stale
+                if (_generations.get(None, 0), _generations.get(namespace, 0)) != generation:
+                    return value
+                if len(_entries) >= MAX_ENTRIES:
+                    # Entries are kept in insertion order, so this drops the oldest
+                    _entries.pop(next(iter(_entries)))
+                _entries[key] = (now + (DEFAULT_TTL if ttl is None else ttl), copy.deepcopy(value))
+            return value
+        return wrapper
+    return decorator
+
+
+def invalidate(*namespaces: str):
+    """Drops every cached entry of the given namespaces, or of all namespaces when none are given."""
+    with _lock:
+        for key in [key for key in _entries if not namespaces or key[0] in namespaces]:
+            del _entries[key]
+        for namespace in namespaces or (None,):
+            _generations[namespace] = _generations.get(namespace, 0) + 1
+
+
+def cache_stats() -> dict:
+    """Hit and miss counts since the process started, and the number of cached entries."""
+    with _lock:
+        return dict(_stats, entries=len(_entries))
@@ -0,0 +1,84 @@
+# ================================
+# Backend Grading Cache Functions
+# ================================
+import json
+
+from backend.query import execute_query, transaction
+
+MAX_CACHE_ENTRIES = 20000
+
+# Once the cache grows beyond MAX_CACHE_ENTRIES it is trimmed to this share of it,
+# so the eviction DELETE runs occasionally rather than after every graded exam
+EVICTION_TARGET = 0.9
+
+def get_cached_evaluations(cache_keys):
+    """
+    Look up cached LLM evaluations.
+
+    Returns a dict mapping each cache key found to an (evaluation, feedback) tuple. Pass the
+    keys that were used to store_cached_evaluations() to mark them as recently used.
+    """
+    if not cache_keys:
+        return {}
+
+    placeholders = ", ".join("?" for _ in cache_keys)
+    rows = execute_query(
+        f"SELECT cache_key, evaluation, feedback FROM Grading_Cache WHERE cache_key IN ({placeholders})",
+        tuple(cache_keys), fetchall=True
+    )
+    if not rows:
+        return {}
+
+    found = {}
+    for cache_key, evaluation, feedback in rows:
+        try:
+            found[cache_key] = (json.loads(evaluation), feedback)
+        except json.JSONDecodeError:
+            continue
+    return found
+
+def store_cached_evaluations(entries, used_keys=()):
+    """
+    Store (cache_key, evaluation, feedback) entries and mark used_keys as recently used, in one
+    transaction. The least recently used entries are evicted once the cache grows beyond
+    MAX_CACHE_ENTRIES.
+    """
+    entries = list(entries)
+    used_keys = list(used_keys)
+    if not entries and not used_keys:
+        return
+
+    with transaction() as conn:
+        conn.executemany(
+            """
+            INSERT INTO Grading_Cache (cache_key, evaluation, feedback)
+            VALUES (?, ?, ?)
+            ON CONFLICT(cache_key)
+            DO UPDATE SET evaluation = excluded.evaluation, feedback = excluded.feedback,
+                          last_used_at = CURRENT_TIMESTAMP
+            """,
+            [(cache_key, json.dumps(evaluation), feedback) for cache_key, evaluation, feedback in entries]
+        )
+        if used_keys:
+            conn.execute(
+                f"""
+                UPDATE Grading_Cache SET hits = hits + 1, last_used_at = CURRENT_TIMESTAMP
+                WHERE cache_key IN ({", ".join("?" for _ in used_keys)})
+                """,
+                tuple(used_keys)
+            )
+
+        if entries:
+            count = conn.execute("SELECT COUNT(*) FROM Grading_Cache").fetchone()[0]
+            if count > MAX_CACHE_ENTRIES:
+                # Walks the last_used_at index from the oldest entry, no sort of the whole table
+                conn.execute(
+                    """
+                    DELETE FROM Grading_Cache WHERE cache_key IN (
+                        SELECT cache_key FROM Grading_Cache
+                        ORDER BY last_used_at
+                        LIMIT ?
+                    )
+                    """,
+                    (count - int(MAX_CACHE_ENTRIES * EVICTION_TARGET),)
+                )
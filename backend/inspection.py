@@ -1,27 +1,32 @@
 import sqlite3
 
-conn = sqlite3.connect("fyp_database.db") 
-cursor = conn.cursor()
+from backend import DATABASE
 
-cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
-tables = cursor.fetchall()
+def main(database=DATABASE):
+    """Print the tables, Tests rows and Student_Test schema of the database."""
+    conn = sqlite3.connect(database) 
+    cursor = conn.cursor()
 
-print("Tables in the database:", tables)
+    cursor.execute("SELECT name FROM sqlite_master WHERE type='table';")
+    tables = cursor.fetchall()
 
-table_name = "Tests" 
-cursor.execute(f"SELECT * FROM {table_name} LIMIT 1000;") 
+    print("Tables in the database:", tables)
 
-rows = cursor.fetchall()
-for row in rows:
-    print(row)
+    table_name = "Tests" 
+    cursor.execute(f"SELECT * FROM {table_name} LIMIT 1000;") 
 
-table_name = "Student_Test" 
-cursor.execute(f"PRAGMA table_info({table_name});")
-schema = cursor.fetchall()
+    rows = cursor.fetchall()
+    for row in rows:
+        print(row)
 
-for column in schema:
-    print(column)
+    table_name = "Student_Test" 
+    cursor.execute(f"PRAGMA table_info({table_name});")
+    schema = cursor.fetchall()
 
-conn.close()
+    for column in schema:
+        print(column)
 
+    conn.close()
 
+if __name__ == "__main__":
+    main()
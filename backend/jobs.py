@@ -0,0 +1,113 @@
+# ================================
+# Backend Grading Job Queue Functions
+# ================================
+from backend.query import execute_query, execute_many
+
+MAX_ATTEMPTS = 3
+
+def enqueue_grading_jobs(submissions, strict=True, conn=None):
+    """Queue (test_id, student_id) submissions for grading, resetting any previous jobs for them."""
+    query = """
+        INSERT INTO Grading_Job (test_id, student_id, strict, status, attempts, error, updated_at)
+        VALUES (?, ?, ?, 'pending', 0, NULL, CURRENT_TIMESTAMP)
+        ON CONFLICT(test_id, student_id)
+        DO UPDATE SET status = 'pending', strict = excluded.strict, attempts = 0,
+                      error = NULL, updated_at = CURRENT_TIMESTAMP
+    """
+    execute_many(query, [(test_id, student_id, int(strict)) for test_id, student_id in submissions], conn)
+
+def enqueue_grading_job(test_id, student_id, strict=True, conn=None):
+    """Queue a submission for grading, resetting any previous job for it."""
+    enqueue_grading_jobs([(test_id, student_id)], strict, conn)
+
+def enqueue_test_regrade(test_id, strict=True):
+    """Queue every submission of a test for (re-)grading; jobs a worker is running are left alone."""
+    query = """
+        INSERT INTO Grading_Job (test_id, student_id, strict, status, attempts, error, updated_at)
+        SELECT test_id, student_id, ?, 'pending', 0, NULL, CURRENT_TIMESTAMP
+        FROM Student_Test WHERE test_id = ?
+        ON CONFLICT(test_id, student_id)
+        DO UPDATE SET status = 'pending', strict = excluded.strict, attempts = 0,
+                      error = NULL, updated_at = CURRENT_TIMESTAMP
+        WHERE Grading_Job.status != 'running'
+    """
+    execute_query(query, (int(strict), test_id), commit=True)
+
+def resume_test_jobs(test_id):
+    """
+    Return a test's unfinished jobs to the queue: failed ones with fresh attempts, and running ones
+    however recent, since an interrupted re-grade leaves graded but unsaved jobs 'running'.
+    """
+    query = """
+        UPDATE Grading_Job
+        SET status = 'pending',
+            attempts = CASE WHEN status = 'failed' THEN 0 ELSE attempts END,
+            error = CASE WHEN status = 'failed' THEN NULL ELSE error END,
+            updated_at = CURRENT_TIMESTAMP
+        WHERE test_id = ? AND status IN ('failed', 'running')
+    """
+    execute_query(query, (test_id,), commit=True)
+
+def claim_next_job(test_id=None):
+    """
+    Atomically mark the oldest pending job (optionally for one test) as running and return it.
+
+    Returns a (id, test_id, student_id, strict) row, or None when the queue is empty.
+    """
+    query = """
+        UPDATE Grading_Job
+        SET status = 'running', attempts = attempts + 1, updated_at = CURRENT_TIMESTAMP
+        WHERE id = (
+            SELECT id FROM Grading_Job
+            WHERE status = 'pending' AND (? IS NULL OR test_id = ?)
+            ORDER BY created_at, id
+            LIMIT 1
+        )
+        RETURNING id, test_id, student_id, strict
+    """
+    return execute_query(query, (test_id, test_id), fetchone=True)
+
+def complete_jobs(job_ids, conn=None):
+    """Mark grading jobs as done."""
+    execute_many(
+        "UPDATE Grading_Job SET status = 'done', error = NULL, updated_at = CURRENT_TIMESTAMP WHERE id = ?",
+        [(job_id,) for job_id in job_ids], conn
+    )
+
+def complete_job(job_id, conn=None):
+    """Mark a grading job as done."""
+    complete_jobs([job_id], conn)
+
+def fail_job(job_id, error):
+    """Record a grading failure, requeueing the job until it runs out of attempts."""
+    query = """
+        UPDATE Grading_Job
+        SET status = CASE WHEN attempts < ? THEN 'pending' ELSE 'failed' END,
+            error = ?, updated_at = CURRENT_TIMESTAMP
+        WHERE id = ?
+    """
+    execute_query(query, (MAX_ATTEMPTS, str(error), job_id), commit=True)
+
+def requeue_stale_jobs(timeout_minutes=15):
+    """Return jobs stuck in 'running' (e.g. after a worker crash) to the queue."""
+    query = """
+        UPDATE Grading_Job
+        SET status = 'pending', updated_at = CURRENT_TIMESTAMP
+        WHERE status = 'running' AND updated_at < datetime('now', ?)
+    """
+    execute_query(query, (f"-{int(timeout_minutes)} minutes",), commit=True)
+
+def get_job_status(test_id, student_id):
+    """Retrieve the grading job status and last error for a submission."""
+    return execute_query(
+        "SELECT status, error FROM Grading_Job WHERE test_id = ? AND student_id = ?",
+        (test_id, student_id), fetchone=True
+    )
+
+def get_job_counts(test_id):
+    """Count the grading jobs of a test by status."""
+    rows = execute_query(
+        "SELECT status, COUNT(*) FROM Grading_Job WHERE test_id = ? GROUP BY status",
+        (test_id,), fetchall=True
+    )
+    return {status: count for status, count in rows} if rows else {}
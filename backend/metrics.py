@@ -0,0 +1,33 @@
+# ================================
+# Backend Metrics Functions
+# ================================
+from backend.query import execute_query, execute_many
+
+def record_spans(spans):
+    """Store (trace_id, name, duration_ms, status, test_id, student_id, prompt_tokens, completion_tokens) rows."""
+    execute_many(
+        """
+        INSERT INTO Metric_Span (trace_id, name, duration_ms, status, test_id, student_id, prompt_tokens, completion_tokens)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """,
+        spans
+    )
+
+def get_spans(since_minutes=1440):
+    """
+    Spans recorded in the last `since_minutes` minutes, as
+    (trace_id, name, duration_ms, status, test_id, prompt_tokens, completion_tokens) rows.
+    """
+    query = """
+        SELECT trace_id, name, duration_ms, status, test_id, prompt_tokens, completion_tokens
+        FROM Metric_Span
+        WHERE created_at >= datetime('now', ?)
+    """
+    return execute_query(query, (f"-{int(since_minutes)} minutes",), fetchall=True)
+
+def prune_spans(max_age_days=30):
+    """Delete spans older than max_age_days."""
+    execute_query(
+        "DELETE FROM Metric_Span WHERE created_at < datetime('now', ?)",
+        (f"-{int(max_age_days)} days",), commit=True
+    )
@@ -0,0 +1,455 @@
+"""
+Versioned database migrations.
+
+Run once at deploy time (and after pulling schema changes), before starting the
+app or any grading workers:
+
+    python -m backend.migrations
+
+The applied version is tracked in SQLite's user_version header. A migration is
+either an SQL script or a function taking the connection, for steps such as
+backfills that need Python. Migrations are written to be safe on databases
+created before versioning was introduced, so those are upgraded in place.
+"""
+import json
+import re
+from collections import Counter
+
+from backend import get_db_connection
+
+def _total_from_result(result):
+    """Total score of a stored result JSON blob, or None if it cannot be determined."""
+    if isinstance(result, dict):
+        if "total_score" in result:
+            return result["total_score"]
+        result = result.get("details")
+    if isinstance(result, list):
+        return round(sum(item.get("score", 0) for item in result if isinstance(item, dict)), 2)
+    return None
+
+def normalize_result_storage(conn):
+    """Adds Student_Test.total_score and the per-question/per-criterion score tables, then backfills them."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Student_Test)")]
+    if "total_score" not in columns:
+        conn.execute("ALTER TABLE Student_Test ADD COLUMN total_score REAL DEFAULT NULL")
+
+    for statement in """
+    CREATE INDEX IF NOT EXISTS idx_student_test_test_id ON Student_Test(test_id, total_score);
+    CREATE INDEX IF NOT EXISTS idx_student_test_student_id ON Student_Test(student_id);
+
+    CREATE TABLE IF NOT EXISTS Question_Score (
+        submission_id INTEGER NOT NULL,
+        question_id INTEGER NOT NULL,
+        test_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        score REAL NOT NULL,
+        PRIMARY KEY (submission_id, question_id),
+        FOREIGN KEY (submission_id) REFERENCES Student_Test(id) ON DELETE CASCADE
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_question_score_test ON Question_Score(test_id, question_id);
+
+    CREATE TABLE IF NOT EXISTS Criterion_Score (
+        submission_id INTEGER NOT NULL,
+        question_id INTEGER NOT NULL,
+        criterion_index INTEGER NOT NULL,
+        binary_score INTEGER NOT NULL,
+        confidence REAL NOT NULL,
+        PRIMARY KEY (submission_id, question_id, criterion_index),
+        FOREIGN KEY (submission_id) REFERENCES Student_Test(id) ON DELETE CASCADE
+    );
+    """.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+    rows = conn.execute("SELECT id, test_id, student_id, result FROM Student_Test WHERE result IS NOT NULL").fetchall()
+    for submission_id, test_id, student_id, result_json in rows:
+        try:
+            result = json.loads(result_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+        conn.execute("UPDATE Student_Test SET total_score = ? WHERE id = ?", (_total_from_result(result), submission_id))
+        details = result.get("details", []) if isinstance(result, dict) else result
+        if not isinstance(details, list):
+            continue
+        conn.executemany(
+            """
+            INSERT OR REPLACE INTO Question_Score (submission_id, question_id, test_id, student_id, score)
+            VALUES (?, ?, ?, ?, ?)
+            """,
+            [
+                (submission_id, item["question_id"], test_id, student_id, item.get("score", 0))
+                for item in details
+                if isinstance(item, dict) and item.get("question_id") is not None
+            ]
+        )
+
+def store_llm_feedback(conn):
+    """Keeps the model's own feedback per question so scores and feedback can be rebuilt without the LLM."""
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Question_Score)")]
+    if "llm_feedback" not in columns:
+        conn.execute("ALTER TABLE Question_Score ADD COLUMN llm_feedback TEXT DEFAULT NULL")
+
+    rows = conn.execute("SELECT id, result FROM Student_Test WHERE result IS NOT NULL").fetchall()
+    for submission_id, result_json in rows:
+        try:
+            result = json.loads(result_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+
+        details = result.get("details", []) if isinstance(result, dict) else result
+        if not isinstance(details, list):
+            continue
+        conn.executemany(
+            "UPDATE Question_Score SET llm_feedback = ? WHERE submission_id = ? AND question_id = ?",
+            [
+                (str(item.get("feedback", "")).split("\n\nCriteria breakdown:")[0], submission_id, item["question_id"])
+                for item in details
+                if isinstance(item, dict) and item.get("question_id") is not None
+            ]
+        )
+
+# Data migrations must keep doing what they did when they were written, so the application
+# code they need is copied here as it was then rather than imported.
+
+_STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how i
+if in into is it its itself just me more most my no nor not now of off on once only or other our ours out over own
+same she should so some such than that the their theirs them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+_WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+def _tokenize(text):
+    return [token for token in _WORD_PATTERN.findall(str(text or "").lower()) if token not in _STOPWORDS]
+
+def _index_bank_questions(conn, test_id, teacher_id, questions):
+    """Migration 8: adds a test's questions to the bank with normalized term frequencies."""
+    for q in questions:
+        bank_id = conn.execute(
+            """
+            INSERT INTO Question_Bank (test_id, question_id, teacher_id, question, model_answer, max_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(test_id, question_id)
+            DO UPDATE SET question = excluded.question, model_answer = excluded.model_answer,
+                          max_score = excluded.max_score
+            RETURNING id
+            """,
+            (test_id, q.get("id"), teacher_id, q.get("question") or "", q.get("model_answer") or "", q.get("max_score"))
+        ).fetchone()[0]
+        conn.execute("DELETE FROM Question_Term WHERE bank_id = ?", (bank_id,))
+        # The question text counts twice as much as the model answer
+        tokens = _tokenize(q.get("question")) * 2 + _tokenize(q.get("model_answer"))
+        conn.executemany(
+            "INSERT INTO Question_Term (term, bank_id, tf) VALUES (?, ?, ?)",
+            [(term, bank_id, count / len(tokens)) for term, count in Counter(tokens).items()]
+        )
+
+_FILLER_PATTERN = re.compile(r"\b(?:" + "|".join(sorted("""
+a an the is are was were be been being very really just also that which this these those its their it there
+such quite simply basically generally usually typically
+""".split())) + r")\b\s*", re.IGNORECASE)
+_SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+_LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+_ACRONYM_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]{1,}s?\b")
+
+def _model_answer_features(text):
+    """Migration 9: the (at most 5) condensed key sentences and 6 key terms of a model answer."""
+    sentences = (_LIST_MARKER_PATTERN.sub("", sentence).strip() for sentence in _SENTENCE_PATTERN.split(str(text or "")))
+    sentences = [sentence for sentence in sentences if sentence]
+    counts = Counter(_tokenize(text))
+    if len(sentences) > 5:
+        scores = [sum(counts[token] for token in set(_tokenize(sentence))) for sentence in sentences]
+        best = sorted(range(len(sentences)), key=lambda i: -scores[i])[:5]
+        sentences = [sentences[i] for i in sorted(best)]
+    key_points = []
+    for sentence in sentences:
+        condensed = " ".join(_FILLER_PATTERN.sub("", sentence).rstrip(".").split())
+        key_points.append(condensed[:1].upper() + condensed[1:])
+
+    acronyms = list(dict.fromkeys(_ACRONYM_PATTERN.findall(str(text or ""))))
+    taken = {acronym.lower() for acronym in acronyms}
+    words = Counter(token for token in _tokenize(text) if len(token) > 2)
+    key_terms = (acronyms + [token for token, _ in words.most_common() if token not in taken])[:6]
+    return {"key_points": key_points, "key_terms": key_terms}
+
+def create_question_bank(conn):
+    """Adds the question bank and its inverted term index, then indexes every existing test."""
+    for statement in """
+    CREATE TABLE IF NOT EXISTS Question_Bank (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_id INTEGER NOT NULL,
+        question_id INTEGER,
+        teacher_id INTEGER NOT NULL,
+        question TEXT NOT NULL,
+        model_answer TEXT,
+        max_score REAL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (test_id) REFERENCES Tests(id) ON DELETE CASCADE,
+        UNIQUE(test_id, question_id)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_question_bank_teacher ON Question_Bank(teacher_id);
+
+    CREATE TABLE IF NOT EXISTS Question_Term (
+        term TEXT NOT NULL,
+        bank_id INTEGER NOT NULL,
+        tf REAL NOT NULL, -- normalized term frequency in the question and model answer
+        PRIMARY KEY (term, bank_id),
+        FOREIGN KEY (bank_id) REFERENCES Question_Bank(id) ON DELETE CASCADE
+    ) WITHOUT ROWID;
+
+    CREATE INDEX IF NOT EXISTS idx_question_term_bank ON Question_Term(bank_id);
+    """.split(";"):
+        if statement.strip():
+            conn.execute(statement)
+
+    for test_id, teacher_id, questions_json in conn.execute("SELECT id, teacher_id, questions_data FROM Tests").fetchall():
+        try:
+            questions = json.loads(questions_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        _index_bank_questions(conn, test_id, teacher_id, [q for q in questions if isinstance(q, dict)])
+
+def add_model_answer_features(conn):
+    """Stores the key points and terms of every model answer with the test's questions."""
+    for test_id, questions_json in conn.execute("SELECT id, questions_data FROM Tests").fetchall():
+        try:
+            questions = json.loads(questions_json)
+        except (json.JSONDecodeError, TypeError):
+            continue
+        questions = [
+            dict(q, **_model_answer_features(q.get("model_answer"))) if isinstance(q, dict) else q
+            for q in questions
+        ]
+        conn.execute("UPDATE Tests SET questions_data = ? WHERE id = ?", (json.dumps(questions), test_id))
+
+def record_evaluation_rubric(conn):
+    """
+    Records which rubric each stored evaluation was made against, so re-scoring never applies
+    one rubric's weights to another's criteria. Existing evaluations are attributed to the rubric
+    of the submission's grading job, or of the test when it has none.
+    """
+    columns = [row[1] for row in conn.execute("PRAGMA table_info(Question_Score)")]
+    if "rubric" not in columns:
+        conn.execute("ALTER TABLE Question_Score ADD COLUMN rubric TEXT DEFAULT NULL")
+
+    conn.execute(
+        """
+        UPDATE Question_Score
+        SET rubric = CASE WHEN COALESCE(
+            (SELECT j.strict FROM Grading_Job j
+             WHERE j.test_id = Question_Score.test_id AND j.student_id = Question_Score.student_id),
+            (SELECT t.strict FROM Tests t WHERE t.id = Question_Score.test_id)
+        ) THEN ? ELSE ? END
+        WHERE rubric IS NULL
+        """,
+        # Rubric.fingerprint() of the strict and lenient rubrics when this migration was written
+        ("46cdd42466b2d804", "63fdbe1ec390421f")
+    )
+
+MIGRATIONS = [
+    (
+        1,
+        "Users, tests, submissions and rubrics",
+        """
+    CREATE TABLE IF NOT EXISTS User (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        last_name TEXT NOT NULL,
+        other_names TEXT NOT NULL,
+        user_type TEXT CHECK(user_type IN ('student', 'teacher')) NOT NULL,
+        matric_number TEXT UNIQUE DEFAULT NULL,
+        title TEXT DEFAULT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE TABLE IF NOT EXISTS Tests (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id INTEGER NOT NULL,
+        test_code TEXT UNIQUE NOT NULL,
+        title TEXT NOT NULL,
+        description TEXT,
+        strict INTEGER DEFAULT 0,
+        questions_data TEXT NOT NULL, -- JSON format
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (teacher_id) REFERENCES User(id) ON DELETE CASCADE
+    );
+
+    CREATE TABLE IF NOT EXISTS Student_Test (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        answers TEXT NOT NULL, -- JSON format
+        result TEXT DEFAULT NULL, -- JSON format
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (test_id) REFERENCES Tests(id) ON DELETE CASCADE,
+        FOREIGN KEY (student_id) REFERENCES User(id) ON DELETE CASCADE,
+        UNIQUE(test_id, student_id) -- Ensures one entry per student per test
+    );
+
+    CREATE TABLE IF NOT EXISTS Rubrics (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        teacher_id INTEGER NOT NULL,
+        title TEXT NOT NULL,
+        rubric_data TEXT NOT NULL, -- JSON format
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (teacher_id) REFERENCES User(id) ON DELETE CASCADE
+    );
+        """,
+    ),
+    (
+        2,
+        "Grading job queue",
+        """
+    CREATE TABLE IF NOT EXISTS Grading_Job (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        test_id INTEGER NOT NULL,
+        student_id INTEGER NOT NULL,
+        status TEXT CHECK(status IN ('pending', 'running', 'done', 'failed')) NOT NULL DEFAULT 'pending',
+        strict INTEGER DEFAULT 1,
+        attempts INTEGER DEFAULT 0,
+        error TEXT DEFAULT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (test_id) REFERENCES Tests(id) ON DELETE CASCADE,
+        FOREIGN KEY (student_id) REFERENCES User(id) ON DELETE CASCADE,
+        UNIQUE(test_id, student_id) -- One grading job per submission
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_grading_job_status ON Grading_Job(status, created_at);
+        """,
+    ),
+    (
+        3,
+        "Grading cache",
+        """
+    CREATE TABLE IF NOT EXISTS Grading_Cache (
+        cache_key TEXT PRIMARY KEY, -- SHA-256 of question, model answer, rubric, strictness, answer and model
+        evaluation TEXT NOT NULL, -- JSON format
+        feedback TEXT NOT NULL,
+        hits INTEGER DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        last_used_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_grading_cache_last_used ON Grading_Cache(last_used_at);
+        """,
+    ),
+    (
+        4,
+        "Normalized per-question and per-criterion scores with materialized totals",
+        normalize_result_storage,
+    ),
+    (
+        5,
+        "Raw LLM feedback per question for re-scoring",
+        store_llm_feedback,
+    ),
+    (
+        6,
+        "Shared LLM rate limit buckets",
+        """
+    CREATE TABLE IF NOT EXISTS Rate_Limit (
+        bucket TEXT PRIMARY KEY, -- e.g. 'groq:requests' or 'groq:tokens'
+        tokens REAL NOT NULL,
+        updated_at REAL NOT NULL -- Unix time of the last refill
+    );
+        """,
+    ),
+    (
+        7,
+        "Grading pipeline timing spans and token usage",
+        """
+    CREATE TABLE IF NOT EXISTS Metric_Span (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        trace_id TEXT, -- groups the spans of one grading
+        name TEXT NOT NULL, -- e.g. 'grading', 'llm_request', 'parse'
+        duration_ms REAL NOT NULL,
+        status TEXT NOT NULL DEFAULT 'ok', -- 'ok', 'error' or 'partial'
+        test_id INTEGER,
+        student_id INTEGER,
+        prompt_tokens INTEGER DEFAULT 0,
+        completion_tokens INTEGER DEFAULT 0,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_metric_span_created ON Metric_Span(created_at, name);
+        """,
+    ),
+    (
+        8,
+        "Question bank with a TF-IDF term index",
+        create_question_bank,
+    ),
+    (
+        9,
+        "Precomputed key points and terms of model answers",
+        add_model_answer_features,
+    ),
+    (
+        10,
+        "Cached per-test result statistics",
+        """
+    CREATE TABLE IF NOT EXISTS Test_Statistics (
+        test_id INTEGER PRIMARY KEY,
+        version INTEGER NOT NULL DEFAULT 0, -- incremented whenever the test's results change
+        stats TEXT, -- JSON format; NULL until computed for the current version
+        computed_at DATETIME,
+        FOREIGN KEY (test_id) REFERENCES Tests(id) ON DELETE CASCADE
+    );
+        """,
+    ),
+    (
+        11,
+        "Rubric of every stored evaluation",
+        record_evaluation_rubric,
+    ),
+    (
+        12,
+        "Recompute statistics with criteria keyed by rubric",
+        """
+    UPDATE Test_Statistics SET version = version + 1, stats = NULL;
+        """,
+    ),
+]
+
+def get_schema_version(conn):
+    """Returns the last migration version applied to the database."""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def migrate():
+    """Applies every pending migration, each in its own transaction. Returns the new version."""
+    conn = get_db_connection()
+    try:
+        current = get_schema_version(conn)
+        for version, description, script in MIGRATIONS:
+            if version <= current:
+                continue
+            print(f"Applying migration {version}: {description}")
+            try:
+                if callable(script):
+                    conn.execute("BEGIN")
+                    script(conn)
+                    conn.execute(f"PRAGMA user_version = {version}")
+                    conn.commit()
+                else:
+                    conn.executescript(f"BEGIN;\n{script}\nPRAGMA user_version = {version};\nCOMMIT;")
+            except Exception:
+                if conn.in_transaction:
+                    conn.rollback()
+                raise
+            current = version
+        return current
+    finally:
+        conn.close()
+
+if __name__ == "__main__":
+    print(f"Database is at schema version {migrate()}.")
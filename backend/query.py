@@ -1,17 +1,68 @@
-from backend import get_db_connection 
+from contextlib import contextmanager
 
-def execute_query(query, params=(), fetchone=False, fetchall=False, commit=False):
-    """Handles database queries with optional fetching or committing."""
-    with get_db_connection() as conn:
+from backend import get_pool
+
+def _run(cursor, query, params, fetchone, fetchall):
+    cursor.execute(query, params)
+
+    if fetchone:
+        return cursor.fetchone()
+
+    if fetchall:
+        return cursor.fetchall()
+
+def execute_query(query, params=(), fetchone=False, fetchall=False, commit=False, conn=None):
+    """
+    Handles database queries with optional fetching or committing.
+
+    When conn is given (see transaction()), the query joins that transaction and is
+    committed together with it instead of on its own.
+    """
+    if conn is not None:
+        return _run(conn.cursor(), query, params, fetchone, fetchall)
+
+    with get_pool().connection() as conn, conn:
         cursor = conn.cursor()
-        cursor.execute(query, params)
 
         if commit:
+            cursor.execute(query, params)
             conn.commit()
             return None
-        
-        if fetchone:
-            return cursor.fetchone()
-        
-        if fetchall:
-            return cursor.fetchall()
+
+        return _run(cursor, query, params, fetchone, fetchall)
+
+def execute_many(query, seq_of_params, conn=None):
+    """Runs one statement for every parameter tuple, in a single transaction."""
+    seq_of_params = list(seq_of_params)
+    if not seq_of_params:
+        return
+
+    if conn is not None:
+        conn.executemany(query, seq_of_params)
+        return
+
+    with get_pool().connection() as conn, conn:
+        conn.executemany(query, seq_of_params)
+
+def iter_query(query, params=(), batch_size=500):
+    """
+    Yields the rows of a query, fetching batch_size rows at a time from one cursor, so large
+    result sets are never held in memory at once. The connection is borrowed until the
+    generator is exhausted or closed.
+    """
+    with get_pool().connection() as conn:
+        cursor = conn.execute(query, params)
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield from rows
+
+@contextmanager
+def transaction():
+    """
+    Unit of work: yields a pooled connection whose statements are committed together
+    on success (one fsync) or rolled back together on error.
+    """
+    with get_pool().connection() as conn, conn:
+        yield conn
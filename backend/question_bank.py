@@ -0,0 +1,127 @@
+# ================================
+# Backend Question Bank Functions
+# ================================
+import math
+from collections import Counter
+
+from backend.query import execute_query, execute_many
+from modules.utils.text_utilities import jaccard_similarity, tokenize
+
+def question_terms(question, model_answer):
+    """Normalized term frequencies of a bank question; the question text counts twice as much as the answer."""
+    tokens = tokenize(question) * 2 + tokenize(model_answer)
+    if not tokens:
+        return {}
+    return {term: count / len(tokens) for term, count in Counter(tokens).items()}
+
+def index_test_questions(test_id, teacher_id, questions, conn=None):
+    """
+    Add (or refresh) a test's questions in the question bank and its inverted term index.
+
+    Only the rows of this test are touched, so the index is updated incrementally.
+    """
+    for q in questions:
+        bank_id = execute_query(
+            """
+            INSERT INTO Question_Bank (test_id, question_id, teacher_id, question, model_answer, max_score)
+            VALUES (?, ?, ?, ?, ?, ?)
+            ON CONFLICT(test_id, question_id)
+            DO UPDATE SET question = excluded.question, model_answer = excluded.model_answer,
+                          max_score = excluded.max_score
+            RETURNING id
+            """,
+            (test_id, q.get("id"), teacher_id, q.get("question") or "", q.get("model_answer") or "", q.get("max_score")),
+            fetchone=True, conn=conn
+        )[0]
+        execute_query("DELETE FROM Question_Term WHERE bank_id = ?", (bank_id,), conn=conn)
+        execute_many(
+            "INSERT INTO Question_Term (term, bank_id, tf) VALUES (?, ?, ?)",
+            [(term, bank_id, tf) for term, tf in question_terms(q.get("question"), q.get("model_answer")).items()],
+            conn
+        )
+
+def find_banked_questions(questions, teacher_id, threshold):
+    """
+    Returns the questions that repeat one in a teacher's part of the bank, i.e. whose word sets
+    overlap more than threshold (Jaccard) with a bank question.
+
+    Bank questions are looked up through the term index: only those sharing more than
+    threshold * len(words) terms with a question can be similar enough, so the rest of the
+    bank is never read.
+    """
+    words = {question: set(tokenize(question)) for question in questions}
+    values = [
+        (question, term, threshold * len(tokens))
+        for question, tokens in words.items() for term in tokens
+    ]
+    if not values:
+        return set()
+
+    rows = execute_query(
+        f"""
+        WITH question_terms(question, term, min_shared) AS (VALUES {", ".join("(?, ?, ?)" for _ in values)})
+        SELECT q.question, b.question
+        FROM question_terms q
+        JOIN Question_Term t ON t.term = q.term
+        JOIN Question_Bank b ON b.id = t.bank_id
+        WHERE b.teacher_id = ?
+        GROUP BY q.question, b.id
+        HAVING COUNT(*) > MIN(q.min_shared)
+        """,
+        tuple(value for row in values for value in row) + (teacher_id,),
+        fetchall=True
+    ) or []
+    return {
+        question for question, bank_question in rows
+        if jaccard_similarity(words[question], set(tokenize(bank_question))) > threshold
+    }
+
+def search_questions(query, limit=20, teacher_id=None):
+    """
+    Rank bank questions against a free-text query by TF-IDF, optionally only those of one teacher.
+
+    Returns (bank_id, test_id, question, model_answer, max_score, score) rows, best first,
+    with exact repeats of a question (e.g. from copied tests) left out.
+    """
+    query_counts = Counter(tokenize(query))
+    if not query_counts:
+        return []
+
+    terms = list(query_counts)
+    placeholders = ", ".join("?" for _ in terms)
+    document_frequency = dict(execute_query(
+        f"SELECT term, COUNT(*) FROM Question_Term WHERE term IN ({placeholders}) GROUP BY term",
+        tuple(terms), fetchall=True
+    ) or [])
+    if not document_frequency:
+        return []
+
+    total = execute_query("SELECT COUNT(*) FROM Question_Bank", fetchone=True)[0]
+    weights = [
+        (term, query_counts[term] * math.log(1 + total / document_frequency[term]))
+        for term in terms if term in document_frequency
+    ]
+
+    rows = execute_query(
+        f"""
+        WITH query_terms(term, weight) AS (VALUES {", ".join("(?, ?)" for _ in weights)})
+        SELECT b.id, b.test_id, b.question, b.model_answer, b.max_score, SUM(t.tf * q.weight) AS score
+        FROM query_terms q
+        JOIN Question_Term t ON t.term = q.term
+        JOIN Question_Bank b ON b.id = t.bank_id
+        WHERE ? IS NULL OR b.teacher_id = ?
+        GROUP BY b.id
+        ORDER BY score DESC, b.id DESC
+        LIMIT ?
+        """,
+        tuple(value for pair in weights for value in pair) + (teacher_id, teacher_id, limit * 2),
+        fetchall=True
+    ) or []
+
+    results, seen = [], set()
+    for row in rows:
+        key = " ".join(tokenize(row[2], drop_stopwords=False))
+        if key not in seen:
+            seen.add(key)
+            results.append(tuple(row))
+    return results[:limit]
@@ -0,0 +1,63 @@
+# ================================
+# Backend Rate Limit Functions
+# ================================
+import time
+
+from backend.query import execute_query, execute_many, transaction
+
+# Buckets hold this many seconds' worth of quota, which bounds the burst after an idle period
+BURST_SECONDS = 10
+
+def bucket_capacity(per_minute):
+    return per_minute * BURST_SECONDS / 60.0
+
+def try_acquire(buckets):
+    """
+    Atomically takes `cost` from every (bucket, per_minute, cost) token bucket, shared by all
+    processes using the database. Buckets refill continuously at per_minute / 60 per second,
+    up to BURST_SECONDS worth.
+
+    A cost above the capacity is taken once the bucket is full and leaves it in debt, so
+    later calls wait until the debt has refilled. Takes nothing unless every bucket can pay.
+    Returns 0 on success, otherwise the seconds to wait until all of them can.
+    """
+    with transaction() as conn:
+        now = time.time()
+        execute_many(
+            "INSERT OR IGNORE INTO Rate_Limit (bucket, tokens, updated_at) VALUES (?, ?, ?)",
+            [(bucket, bucket_capacity(per_minute), now) for bucket, per_minute, _ in buckets], conn
+        )
+
+        wait = 0.0
+        for bucket, per_minute, cost in buckets:
+            tokens = execute_query(
+                """
+                UPDATE Rate_Limit
+                SET tokens = MIN(?, tokens + MAX(0, ? - updated_at) * ? / 60.0), updated_at = ?
+                WHERE bucket = ?
+                RETURNING tokens
+                """,
+                (bucket_capacity(per_minute), now, per_minute, now, bucket), fetchone=True, conn=conn
+            )[0]
+            needed = min(cost, bucket_capacity(per_minute))
+            if tokens < needed:
+                wait = max(wait, (needed - tokens) * 60.0 / per_minute)
+
+        if wait == 0:
+            execute_many(
+                "UPDATE Rate_Limit SET tokens = tokens - ? WHERE bucket = ?",
+                [(cost, bucket) for bucket, _, cost in buckets], conn
+            )
+        return wait
+
+def adjust(bucket, per_minute, amount):
+    """
+    Returns unused tokens (e.g. a reserved completion budget that was not used) to a bucket,
+    or takes a negative amount that a call used beyond its reservation, which may leave it in debt.
+    """
+    if not amount:
+        return
+    execute_query(
+        "UPDATE Rate_Limit SET tokens = MIN(?, tokens + ?) WHERE bucket = ?",
+        (bucket_capacity(per_minute), amount, bucket), commit=True
+    )
@@ -1,8 +1,12 @@
 # ================================
 # Backend Results Functions
 # ================================
-from backend.query import execute_query
+from backend.cache import RESULTS_TTL, cached, invalidate
+from backend.query import execute_query, execute_many, iter_query, transaction
+from backend.jobs import complete_jobs
+from backend.analytics import mark_statistics_stale
 from dataclasses import dataclass
+from typing import Dict, List, Optional
 import json
 
 @dataclass
@@ -10,6 +14,9 @@ class Result:
     question_id: int
     score: float 
     feedback: str
+    evaluation: Optional[Dict[str, List[float]]] = None  # criterion index -> [binary score, confidence]
+    llm_feedback: Optional[str] = None  # the model's own feedback, without the criteria breakdown
+    rubric: Optional[str] = None  # fingerprint of the rubric the evaluation was made against
 
 class ResultEncoder(json.JSONEncoder):
     def default(self, obj):
@@ -17,33 +24,234 @@ class ResultEncoder(json.JSONEncoder):
             return obj.__dict__
         return super().default(obj)
 
-def save_results(test_id, student_id, results):
-    """Store student test results in the database."""
+def serialize_results(results):
+    """Serialize grading results (which may contain Result objects) to JSON."""
     try:
-        results_json = json.dumps(results, cls=ResultEncoder)
+        return json.dumps(results, cls=ResultEncoder)
     except TypeError:
-        results_json = json.dumps({"error": "Invalid results format"})
-    
-    query = """
+        return json.dumps({"error": "Invalid results format"})
+
+def _result_details(results):
+    """Per-question entries of a results dict/list as plain dicts."""
+    details = results.get("details", []) if isinstance(results, dict) else results
+    if not isinstance(details, list):
+        return []
+    return [item.__dict__ if isinstance(item, Result) else item for item in details if isinstance(item, (Result, dict))]
+
+def _total_score(results, details):
+    if isinstance(results, dict) and isinstance(results.get("total_score"), (int, float)):
+        return results["total_score"]
+    return round(sum(item.get("score", 0) for item in details), 2)
+
+def save_results_many(graded, conn=None):
+    """
+    Store (test_id, student_id, results) rows for many submissions in one transaction.
+
+    Besides the result JSON, this maintains the materialized Student_Test.total_score and the
+    normalized Question_Score / Criterion_Score rows used by the teacher views, and marks the
+    tests' cached statistics stale.
+    """
+    graded = list(graded)
+    if conn is None:
+        with transaction() as conn:
+            save_results_many(graded, conn)
+        invalidate("results")
+        return
+
+    result_rows, submissions, question_rows, criterion_rows = [], [], [], []
+    for test_id, student_id, results in graded:
+        details = _result_details(results)
+        result_rows.append((serialize_results(results), _total_score(results, details), test_id, student_id))
+        submissions.append((test_id, student_id))
+        for item in details:
+            question_id = item.get("question_id")
+            if question_id is None:
+                continue
+            question_rows.append((question_id, test_id, student_id, item.get("score", 0), item.get("llm_feedback"), item.get("rubric"), test_id, student_id))
+            for criterion_index, pair in (item.get("evaluation") or {}).items():
+                try:
+                    binary_score, confidence = pair
+                    criterion_rows.append((question_id, int(criterion_index), int(binary_score), float(confidence), test_id, student_id))
+                except (TypeError, ValueError):
+                    continue
+
+    execute_many(
+        """
         UPDATE Student_Test 
-        SET result = ?, updated_at = CURRENT_TIMESTAMP
+        SET result = ?, total_score = ?, updated_at = CURRENT_TIMESTAMP
         WHERE test_id = ? AND student_id = ?
+        """,
+        result_rows, conn
+    )
+    for table in ("Question_Score", "Criterion_Score"):
+        execute_many(
+            f"DELETE FROM {table} WHERE submission_id = (SELECT id FROM Student_Test WHERE test_id = ? AND student_id = ?)",
+            submissions, conn
+        )
+    execute_many(
+        """
+        INSERT OR REPLACE INTO Question_Score (submission_id, question_id, test_id, student_id, score, llm_feedback, rubric)
+        SELECT id, ?, ?, ?, ?, ?, ? FROM Student_Test WHERE test_id = ? AND student_id = ?
+        """,
+        question_rows, conn
+    )
+    execute_many(
+        """
+        INSERT OR REPLACE INTO Criterion_Score (submission_id, question_id, criterion_index, binary_score, confidence)
+        SELECT id, ?, ?, ?, ? FROM Student_Test WHERE test_id = ? AND student_id = ?
+        """,
+        criterion_rows, conn
+    )
+    mark_statistics_stale([test_id for test_id, _ in submissions], conn)
+
+def save_results(test_id, student_id, results):
+    """Store student test results in the database."""
+    save_results_many([(test_id, student_id, results)])
+
+def save_graded_submissions(graded_jobs):
+    """
+    Unit of work for the grading pipeline: stores the results of many graded
+    (job_id, test_id, student_id, results) submissions and marks their jobs as done,
+    all in a single transaction.
     """
-    execute_query(query, (results_json, test_id, student_id), commit=True)
+    graded_jobs = list(graded_jobs)
+    if not graded_jobs:
+        return
 
-def get_results_by_id(test_id):
-    """Retrieve student results for a specific test."""
+    with transaction() as conn:
+        save_results_many([(test_id, student_id, results) for _, test_id, student_id, results in graded_jobs], conn)
+        complete_jobs([job_id for job_id, _, _, _ in graded_jobs], conn)
+    invalidate("results")
+
+# Sort keys accepted by get_results_page; missing values (e.g. ungraded scores) always sort last
+RESULT_SORTS = {
+    "name": "u.other_names || ' ' || u.last_name",
+    "matric": "u.matric_number",
+    "score": "s.total_score",
+    "submitted": "s.created_at",
+}
+
+@cached("results", RESULTS_TTL)
+def get_results_page(test_id, limit=50, offset=0, sort="name", descending=False, search=None,
+                     min_score=None, max_score=None, graded=None):
+    """
+    One page of a test's results, sorted and filtered in SQL so only the rows shown are read.
+
+    search matches the student's name or matric number, min_score (inclusive) and max_score
+    (exclusive) select a score band, and graded=True/False keeps only graded/ungraded submissions.
+    Returns ((full_name, matric_number, total_score, result_id) rows, number of matching submissions).
+    """
+    conditions, params = ["s.test_id = ?"], [test_id]
+    if search:
+        conditions.append(
+            "(u.other_names || ' ' || u.last_name LIKE ? ESCAPE '\\' OR u.last_name || ' ' || u.other_names LIKE ? ESCAPE '\\'"
+            " OR u.matric_number LIKE ? ESCAPE '\\')"
+        )
+        # % and _ in the search are matched literally
+        pattern = search.strip().replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+        params += [f"%{pattern}%"] * 3
+    if min_score is not None:
+        conditions.append("s.total_score >= ?")
+        params.append(min_score)
+    if max_score is not None:
+        conditions.append("s.total_score < ?")
+        params.append(max_score)
+    if graded is not None:
+        conditions.append("s.total_score IS NOT NULL" if graded else "s.total_score IS NULL")
+    where = " AND ".join(conditions)
+
+    column = RESULT_SORTS[sort]
+    order = f"{column} IS NULL, {column} {'DESC' if descending else 'ASC'}"
+    total = execute_query(f"SELECT COUNT(*) FROM Student_Test s JOIN User u ON s.student_id = u.id WHERE {where}",
+                          tuple(params), fetchone=True)[0]
+    rows = execute_query(
+        f"""
+        SELECT u.other_names || ' ' || u.last_name AS full_name, u.matric_number, s.total_score, s.id
+        FROM Student_Test s
+        JOIN User u ON s.student_id = u.id
+        WHERE {where}
+        ORDER BY {order}, s.id
+        LIMIT ? OFFSET ?
+        """,
+        tuple(params) + (limit, offset), fetchall=True
+    )
+    return [tuple(row) for row in rows or []], total
+
+@cached("results", RESULTS_TTL)
+def get_results_summary(test_id):
+    """
+    Aggregate scores for a test straight from the indexed total_score column.
+
+    Returns a (submissions, graded, average, lowest, highest) row.
+    """
+    query = """
+        SELECT COUNT(*), COUNT(total_score), ROUND(AVG(total_score), 2), MIN(total_score), MAX(total_score)
+        FROM Student_Test
+        WHERE test_id = ?
+    """
+    return tuple(execute_query(query, (test_id,), fetchone=True))
+
+def iter_result_rows(test_id, batch_size=500):
+    """
+    Streams the results of a test for export, one submission at a time.
+
+    Yields (full_name, matric_number, total_score, {question_id: score}) tuples in submission
+    order; total_score is None for ungraded submissions.
+    """
+    query = """
+        SELECT s.id, u.other_names || ' ' || u.last_name AS full_name, u.matric_number, s.total_score,
+               q.question_id, q.score
+        FROM Student_Test s
+        JOIN User u ON s.student_id = u.id
+        LEFT JOIN Question_Score q ON q.submission_id = s.id
+        WHERE s.test_id = ?
+        ORDER BY s.id
+    """
+    current, row, scores = None, None, {}
+    for submission_id, full_name, matric_number, total_score, question_id, score in iter_query(query, (test_id,), batch_size):
+        if submission_id != current:
+            if current is not None:
+                yield row + (scores,)
+            current, row, scores = submission_id, (full_name, matric_number, total_score), {}
+        if question_id is not None:
+            scores[question_id] = score
+    if current is not None:
+        yield row + (scores,)
+
+def iter_submission_details(test_id, batch_size=500):
+    """
+    Streams every submission of a test with its answers and result JSON, in submission order.
+
+    Yields (submission_id, full_name, matric_number, answers_json, result_json, total_score) rows.
+    """
     query = """
-        SELECT u.other_names || ' ' || u.last_name AS full_name, 
-               u.matric_number, 
-               s.result, 
-               s.id 
-        FROM Student_Test s 
-        JOIN User u ON s.student_id = u.id 
+        SELECT s.id, u.other_names || ' ' || u.last_name AS full_name, u.matric_number,
+               s.answers, s.result, s.total_score
+        FROM Student_Test s
+        JOIN User u ON s.student_id = u.id
         WHERE s.test_id = ?
+        ORDER BY s.id
+    """
+    for row in iter_query(query, (test_id,), batch_size):
+        yield tuple(row)
+
+def get_stored_evaluations(test_id):
+    """
+    Raw LLM evaluations kept for every graded question of a test, for re-scoring without the LLM.
+
+    Returns (student_id, question_id, llm_feedback, rubric, criterion_index, binary_score, confidence)
+    rows, where rubric is the fingerprint of the rubric the question was evaluated against; the
+    criterion columns are NULL for questions stored without an evaluation.
+    """
+    query = """
+        SELECT q.student_id, q.question_id, q.llm_feedback, q.rubric, c.criterion_index, c.binary_score, c.confidence
+        FROM Question_Score q
+        LEFT JOIN Criterion_Score c ON c.submission_id = q.submission_id AND c.question_id = q.question_id
+        WHERE q.test_id = ?
     """
     return execute_query(query, (test_id,), fetchall=True)
 
+@cached("results", RESULTS_TTL)
 def get_student_results(student_id: int) -> dict | None:
     """
     Fetch all test results for the given student.
@@ -1,10 +1,14 @@
 import json
 import random
 import string
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from typing import List
 
-from backend.query import execute_query
+from backend.cache import cached, invalidate
+from backend.query import execute_query, execute_many, transaction
+from backend.jobs import enqueue_grading_jobs
+from backend.question_bank import index_test_questions
+from modules.utils.text_utilities import model_answer_features
 
 @dataclass
 class Question:
@@ -12,6 +16,8 @@ class Question:
     question: str
     model_answer: str
     max_score: float
+    key_points: List[str] = field(default_factory=list)
+    key_terms: List[str] = field(default_factory=list)
 
 @dataclass
 class Test:
@@ -35,6 +41,7 @@ def create_test_from_existing(existing_test_id: int) -> Test:
         )
     return None
 
+@cached("questions")
 def get_questions(test_id: int):
     """Retrieve questions from the Tests table."""
     result = execute_query("SELECT questions_data FROM Tests WHERE id = ?", (test_id,), fetchone=True)
@@ -46,6 +53,13 @@ def get_student_answers(test_id: int, student_id: int):
                            (test_id, student_id), fetchone=True)
     return json.loads(result[0]) if result else None
 
+@cached("tests")
+def get_test_info(test_id: int):
+    """Retrieve the (title, test_code) of a test."""
+    result = execute_query("SELECT title, test_code FROM Tests WHERE id = ?", (test_id,), fetchone=True)
+    return tuple(result) if result else None
+
+@cached("tests")
 def get_tests_by_id(user_id):
     """Retrieve tests created by a specific teacher."""
     query = "SELECT id, test_code, title, created_at FROM Tests WHERE teacher_id = ?"
@@ -56,13 +70,19 @@ def get_tests_by_id(user_id):
 
 
 def save_test(teacher_id, test_code, title, description, questions, strict):
-    """Save a new test into the database with strictness option."""
+    """
+    Save a new test into the database with strictness option.
+
+    The key points and terms of every model answer are extracted once here, so grading
+    can send those instead of the full model answers (see modules.grading).
+    """
     questions_list = [
         {
             "id": q.get("id"),
             "question": q.get("question"),
             "model_answer": q.get("model_answer"),
-            "max_score": q.get("max_score")
+            "max_score": q.get("max_score"),
+            **model_answer_features(q.get("model_answer"))
         }
         for q in questions
     ]
@@ -72,10 +92,15 @@ def save_test(teacher_id, test_code, title, description, questions, strict):
     query = """
         INSERT INTO Tests (teacher_id, test_code, title, description, questions_data, strict)
         VALUES (?, ?, ?, ?, ?, ?)
+        RETURNING id
     """
     
     try:
-        execute_query(query, (teacher_id, test_code, title, description, questions_json, int(strict)), commit=True)
+        # The test and its question bank entries are saved together
+        with transaction() as conn:
+            test_id = execute_query(query, (teacher_id, test_code, title, description, questions_json, int(strict)), fetchone=True, conn=conn)[0]
+            index_test_questions(test_id, teacher_id, questions_list, conn)
+        invalidate("tests")
         return True  
     except Exception as e:
         print("Error saving test:", e)
@@ -89,13 +114,27 @@ def check_previous_attempt(test_id, student_id):
     """Check if a student has already taken the exam."""
     return execute_query("SELECT answers FROM Student_Test WHERE test_id = ? AND student_id = ?", (test_id, student_id), fetchone=True)
 
-def save_student_answers(test_id, student_id, student_answers):
-    """Save or update student answers in the database."""
+def save_student_answers_many(submissions, strict=True, conn=None):
+    """
+    Save or update (test_id, student_id, answers) submissions and queue them for grading,
+    all in one transaction.
+    """
     query = """
         INSERT INTO Student_Test (test_id, student_id, answers, updated_at) 
         VALUES (?, ?, ?, CURRENT_TIMESTAMP)
         ON CONFLICT(test_id, student_id) 
         DO UPDATE SET answers = excluded.answers, updated_at = CURRENT_TIMESTAMP
     """
-    execute_query(query, (test_id, student_id, json.dumps(student_answers)))
-
+    submissions = list(submissions)
+    if conn is None:
+        with transaction() as conn:
+            save_student_answers_many(submissions, strict, conn)
+        invalidate("results")
+        return
+
+    execute_many(query, [(test_id, student_id, json.dumps(answers)) for test_id, student_id, answers in submissions], conn)
+    enqueue_grading_jobs([(test_id, student_id) for test_id, student_id, _ in submissions], strict, conn)
+
+def save_student_answers(test_id, student_id, student_answers, strict=True):
+    """Save or update student answers in the database and queue them for grading."""
+    save_student_answers_many([(test_id, student_id, student_answers)], strict)
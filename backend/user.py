@@ -1,4 +1,5 @@
 import bcrypt
+from backend.cache import cached, invalidate
 from backend.query import execute_query
 
 def hash_password(password):
@@ -29,7 +30,9 @@ def update_user_info(user_id: int, **kwargs):
     query = f"UPDATE User SET {columns} WHERE id = ?"
 
     execute_query(query, values, commit=True)
+    invalidate("user")
 
+@cached("user")
 def get_user_type_by_email(email):
     """Retrieve the user type for a given email."""
     result = execute_query("SELECT user_type FROM User WHERE email = ?", (email,), fetchone=True)
@@ -37,8 +40,8 @@ def get_user_type_by_email(email):
 
 def get_first_name_by_email(email):
     """Retrieve the first name from other_names for a given email."""
-    result = execute_query("SELECT other_names FROM User WHERE email = ?", (email,), fetchone=True)
-    return result[0].split()[0] if result else "User"
+    user = get_user_profile_by_email(email)
+    return user[2].split()[0] if user else "User"
 
 def create_user(email, password, last_name, other_names, user_type, matric_number=None, title=None):
     """Insert a new user into the database."""
@@ -48,6 +51,7 @@ def create_user(email, password, last_name, other_names, user_type, matric_numbe
     VALUES (?, ?, ?, ?, ?, ?, ?)
     '''
     execute_query(query, (email, password_hash, last_name, other_names, user_type, matric_number, title), commit=True)
+    invalidate("user")
     return True
 
 def authenticate_user(email, password):
@@ -63,20 +67,20 @@ def authenticate_user(email, password):
 
     return True
 
+@cached("user")
 def get_user_type_by_id(user_id):
     """Fetches the user type from the database using execute_query."""
     query = "SELECT user_type FROM User WHERE id = ?"
     result = execute_query(query, (user_id,), fetchone=True)
     return result[0] if result else None
 
+@cached("user")
 def get_user_profile_by_email(email):
     """Fetches a user's profile by email."""
-    name = get_first_name_by_email(email)
-
     query = """
         SELECT id, last_name, other_names, user_type, matric_number, title 
         FROM user 
         WHERE email = ?
     """
     user = execute_query(query, (email,), fetchone=True)
-    return user
\ No newline at end of file
+    return tuple(user) if user else None
\ No newline at end of file
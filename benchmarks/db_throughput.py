@@ -0,0 +1,133 @@
+"""
+SQLite data layer benchmark: queries/sec under concurrent load.
+
+Compares the old access pattern (a new connection per query, rollback journal)
+against the pooled WAL connections used by backend.query.execute_query. Reader
+threads run the teacher results query while one writer keeps saving results:
+
+    python benchmarks/db_throughput.py --readers 8 --seconds 5 --students 500
+"""
+import argparse
+import json
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+RESULTS_QUERY = """
+    SELECT u.other_names || ' ' || u.last_name AS full_name,
+           u.matric_number,
+           s.result,
+           s.id
+    FROM Student_Test s
+    JOIN User u ON s.student_id = u.id
+    WHERE s.test_id = ?
+"""
+
+SAVE_RESULT_QUERY = """
+    UPDATE Student_Test SET result = ?, updated_at = CURRENT_TIMESTAMP
+    WHERE test_id = ? AND student_id = ?
+"""
+
+
+def seed_database(path: str, num_students: int):
+    conn = sqlite3.connect(path)
+    conn.executescript("""
+        CREATE TABLE User (id INTEGER PRIMARY KEY AUTOINCREMENT, email TEXT, password TEXT,
+                           last_name TEXT, other_names TEXT, user_type TEXT, matric_number TEXT);
+        CREATE TABLE Student_Test (id INTEGER PRIMARY KEY AUTOINCREMENT, test_id INTEGER, student_id INTEGER,
+                                   answers TEXT, result TEXT, created_at DATETIME, updated_at DATETIME,
+                                   UNIQUE(test_id, student_id));
+    """)
+    result = json.dumps({"total_score": 5.0, "details": [{"question_id": q, "score": 1.0, "feedback": "x" * 200} for q in range(5)]})
+    for s in range(1, num_students + 1):
+        conn.execute("INSERT INTO User (email, password, last_name, other_names, user_type, matric_number) VALUES (?, 'x', ?, 'Bench', 'student', ?)",
+                     (f"s{s}@example.com", f"Student{s}", f"M{s:05d}"))
+        conn.execute("INSERT INTO Student_Test (test_id, student_id, answers, result) VALUES (1, ?, '{}', ?)", (s, result))
+    conn.commit()
+    conn.close()
+
+
+def unpooled_query(path):
+    """The original access pattern: a brand-new connection for every query."""
+    def run(query, params=(), commit=False):
+        with sqlite3.connect(path) as conn:
+            cursor = conn.execute(query, params)
+            if commit:
+                conn.commit()
+                return None
+            return cursor.fetchall()
+    return run
+
+
+def run_load(run_query, readers: int, seconds: float, num_students: int):
+    stop = threading.Event()
+    counts = {"reads": 0, "writes": 0, "errors": 0}
+    lock = threading.Lock()
+
+    def reader():
+        while not stop.is_set():
+            try:
+                run_query(RESULTS_QUERY, (1,))
+                key = "reads"
+            except sqlite3.OperationalError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    def writer():
+        student = 0
+        while not stop.is_set():
+            student = student % num_students + 1
+            try:
+                run_query(SAVE_RESULT_QUERY, (json.dumps({"total_score": student % 10}), 1, student), commit=True)
+                key = "writes"
+            except sqlite3.OperationalError:
+                key = "errors"
+            with lock:
+                counts[key] += 1
+
+    threads = [threading.Thread(target=reader) for _ in range(readers)] + [threading.Thread(target=writer)]
+    for thread in threads:
+        thread.start()
+    time.sleep(seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    return {key: value / seconds for key, value in counts.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark SQLite access with and without pooling/WAL.")
+    parser.add_argument("--readers", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--students", type=int, default=500)
+    args = parser.parse_args()
+
+    work_dir = tempfile.mkdtemp()
+    before_path = os.path.join(work_dir, "before.db")
+    after_path = os.path.join(work_dir, "after.db")
+    seed_database(before_path, args.students)
+    shutil.copy(before_path, after_path)
+
+    os.environ["DATABASE_PATH"] = after_path
+    from backend.query import execute_query
+
+    def pooled_query(query, params=(), commit=False):
+        return execute_query(query, params, fetchall=not commit, commit=commit)
+
+    for label, run_query in (("before (new connection per query)", unpooled_query(before_path)),
+                             ("after (pooled, WAL)", pooled_query)):
+        rates = run_load(run_query, args.readers, args.seconds, args.students)
+        print(f"{label:36s} reads/s: {rates['reads']:9.1f}  writes/s: {rates['writes']:9.1f}  errors/s: {rates['errors']:.1f}")
+
+    shutil.rmtree(work_dir, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
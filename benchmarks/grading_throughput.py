@@ -0,0 +1,92 @@
+"""
+Offline end-to-end grading throughput benchmark.
+
+Seeds a throwaway database with one test and many submissions, then grades them
+all through the regular bulk re-grade path using the fake LLM provider:
+
+    python benchmarks/grading_throughput.py --submissions 200 --questions 10 --latency 0.5 --workers 8
+
+With --quota-rpm the fake provider rejects calls above a requests/min quota,
+and --client-rpm enables the shared client-side limiter to stay under it.
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def seed_database(num_submissions: int, num_questions: int) -> int:
+    from backend.query import execute_query
+
+    execute_query(
+        "INSERT INTO User (email, password, last_name, other_names, user_type) VALUES (?, ?, ?, ?, 'teacher')",
+        ("teacher@example.com", "x", "Teacher", "Bench"), commit=True
+    )
+    teacher_id = execute_query("SELECT id FROM User WHERE email = ?", ("teacher@example.com",), fetchone=True)[0]
+
+    questions = [
+        {"id": q, "question": f"Explain concept {q}.", "model_answer": f"Concept {q} is explained like this.", "max_score": 2}
+        for q in range(1, num_questions + 1)
+    ]
+    execute_query(
+        "INSERT INTO Tests (teacher_id, test_code, title, description, questions_data, strict) VALUES (?, ?, ?, ?, ?, 1)",
+        (teacher_id, "BENCH1", "Benchmark", "", json.dumps(questions)), commit=True
+    )
+    test_id = execute_query("SELECT id FROM Tests WHERE test_code = ?", ("BENCH1",), fetchone=True)[0]
+
+    for s in range(num_submissions):
+        execute_query(
+            "INSERT INTO User (email, password, last_name, other_names, user_type, matric_number) VALUES (?, ?, ?, ?, 'student', ?)",
+            (f"student{s}@example.com", "x", f"Student{s}", "Bench", f"M{s:05d}"), commit=True
+        )
+        student_id = execute_query("SELECT id FROM User WHERE email = ?", (f"student{s}@example.com",), fetchone=True)[0]
+        answers = {str(q["id"]): f"Student {s} writes about concept {q['id']}." for q in questions}
+        execute_query(
+            "INSERT INTO Student_Test (test_id, student_id, answers) VALUES (?, ?, ?)",
+            (test_id, student_id, json.dumps(answers)), commit=True
+        )
+    return test_id
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark grading throughput with the fake LLM provider.")
+    parser.add_argument("--submissions", type=int, default=100)
+    parser.add_argument("--questions", type=int, default=10)
+    parser.add_argument("--workers", type=int, default=8, help="Concurrent gradings")
+    parser.add_argument("--latency", type=float, default=0.2, help="Mean fake LLM latency in seconds")
+    parser.add_argument("--failure-rate", type=float, default=0.0, help="Share of fake LLM calls that are rate-limited")
+    parser.add_argument("--quota-rpm", type=int, default=0, help="Simulated provider quota; calls above it are rate-limited")
+    parser.add_argument("--client-rpm", type=float, default=0, help="Client-side requests/min limit (0 = off)")
+    parser.add_argument("--mode", choices=("exam", "per-question", "stream"), default="exam", help="Grading mode")
+    args = parser.parse_args()
+
+    db_dir = tempfile.mkdtemp()
+    os.environ["DATABASE_PATH"] = os.path.join(db_dir, "bench.db")
+    os.environ["GRADING_PROVIDER"] = "fake"
+    os.environ["FAKE_LLM_LATENCY"] = str(args.latency)
+    os.environ["FAKE_LLM_FAILURE_RATE"] = str(args.failure_rate)
+    os.environ["FAKE_LLM_QUOTA_RPM"] = str(args.quota_rpm)
+    os.environ["FAKE_REQUESTS_PER_MINUTE"] = str(args.client_rpm)
+
+    from backend.migrations import migrate
+    from modules.llm import get_provider
+    from modules.regrade import regrade_test
+
+    migrate()
+    test_id = seed_database(args.submissions, args.questions)
+
+    start = time.perf_counter()
+    counts = regrade_test(test_id, max_workers=args.workers, mode=args.mode)
+    elapsed = time.perf_counter() - start
+
+    print(f"Graded {counts.get('done', 0)} submissions ({counts.get('failed', 0)} failed) in {elapsed:.2f}s")
+    print(f"Throughput: {counts.get('done', 0) / elapsed:.2f} submissions/s")
+    print(f"Rate-limited LLM calls: {get_provider('grading').provider.rejected_calls}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,76 @@
+"""
+Rubric scoring benchmark: per-criterion Python loop vs vectorized cohort scoring.
+
+Generates random evaluations for a cohort and scores them both ways:
+
+    python benchmarks/scoring_throughput.py --submissions 1000 --questions 20
+"""
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..")))
+
+
+def loop_criterion_score(binary_score, confidence, strict):
+    """The original scalar formula, kept here as the baseline."""
+    if confidence >= 0.8:
+        return binary_score
+    if binary_score == 1:
+        return 0.6 * binary_score + 0.4 * confidence if strict else 0.3 * binary_score + 0.7 * confidence
+    return 0.4 * (1 - confidence) if strict else 0.7 * (1 - confidence)
+
+
+def loop_scores(binary, confidence, rubric, max_scores, strict):
+    """The original approach: one Python call per criterion per question."""
+    binary, confidence, max_scores = binary.tolist(), confidence.tolist(), max_scores.tolist()
+    totals = []
+    for s in range(len(binary)):
+        total = 0.0
+        for q in range(len(binary[s])):
+            score = sum(
+                loop_criterion_score(binary[s][q][c], confidence[s][q][c], strict) * criterion.weight
+                for c, criterion in enumerate(rubric.criteria)
+            )
+            total += round(score * max_scores[q], 2)
+        totals.append(round(total, 2))
+    return np.array(totals)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark rubric scoring for a whole cohort.")
+    parser.add_argument("--submissions", type=int, default=1000)
+    parser.add_argument("--questions", type=int, default=20)
+    parser.add_argument("--lenient", action="store_true")
+    args = parser.parse_args()
+
+    from modules.scoring import score_cohort
+    from rubric import LENIENT_RUBRIC, STRICT_RUBRIC
+
+    rubric = LENIENT_RUBRIC if args.lenient else STRICT_RUBRIC
+    strict = not args.lenient
+    rng = np.random.default_rng(0)
+    shape = (args.submissions, args.questions, len(rubric.criteria))
+    binary = rng.integers(0, 2, shape).astype(float)
+    confidence = rng.integers(0, 101, shape) / 100
+    max_scores = rng.integers(1, 11, args.questions).astype(float)
+
+    start = time.perf_counter()
+    expected = loop_scores(binary, confidence, rubric, max_scores, strict)
+    loop_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    _, totals = score_cohort(binary, confidence, rubric, max_scores, strict)
+    vector_time = time.perf_counter() - start
+
+    print(f"{args.submissions} submissions x {args.questions} questions x {len(rubric.criteria)} criteria")
+    print(f"python loop: {loop_time * 1000:9.1f} ms")
+    print(f"vectorized:  {vector_time * 1000:9.1f} ms  ({loop_time / vector_time:.0f}x)")
+    print(f"max total difference: {np.abs(expected - totals).max():.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,21 @@
+import os
+
+
+def get_setting(name, default=None, cast=str):
+    """
+    Reads a configuration value from the environment, then from Streamlit secrets,
+    falling back to the default when it is set in neither.
+    """
+    value = os.environ.get(name)
+    if value is None:
+        try:
+            import streamlit as st
+            value = st.secrets.get(name)
+        except Exception:
+            value = None
+
+    if value is None:
+        return default
+    if cast is bool and isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "yes", "on")
+    return cast(value)
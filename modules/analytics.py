@@ -0,0 +1,194 @@
+"""
+Cohort analytics for a test.
+
+Scores are loaded from Question_Score into a (submissions, questions) matrix and
+every statistic is computed with NumPy over whole columns at once:
+
+- per question: mean, median, standard deviation, difficulty (mean score as a
+  share of the max score) and discrimination (correlation of the question score
+  with the rest of the exam score), plus a score distribution,
+- per rubric criterion: pass rates overall and per question, kept apart per
+  rubric since the same index means a different criterion in each,
+- the distribution of total scores.
+
+The result is stored in Test_Statistics. It is not updated incrementally: saving
+results only marks it stale in the same transaction, and the next read
+recomputes it in full from Question_Score, so the dashboard reads one row
+however large the cohort is.
+"""
+import json
+from typing import Dict, List
+
+import numpy as np
+
+from backend.analytics import (
+    get_criterion_pass_rates,
+    get_question_score_rows,
+    get_stored_statistics,
+    store_statistics,
+)
+from backend.tests import get_questions
+from rubric import LENIENT_RUBRIC, STRICT_RUBRIC
+
+# Histogram bins for total scores and for question scores (as shares of the obtainable score)
+TOTAL_SCORE_BINS = 10
+QUESTION_SCORE_BINS = 5
+
+# Questions below this discrimination do not separate strong from weak students well
+LOW_DISCRIMINATION = 0.2
+
+# Rubrics whose criteria can be named, by fingerprint
+KNOWN_RUBRICS = {
+    STRICT_RUBRIC.fingerprint(): ("Strict", STRICT_RUBRIC),
+    LENIENT_RUBRIC.fingerprint(): ("Lenient", LENIENT_RUBRIC),
+}
+
+
+def _number(value, digits=3):
+    """Rounds a NumPy scalar for JSON; NaN becomes None."""
+    value = float(value)
+    return None if np.isnan(value) else round(value, digits)
+
+
+def score_matrix(rows, question_ids: List[int]) -> np.ndarray:
+    """
+    Arranges (submission_id, question_id, score) rows into a (submissions, questions) matrix
+    with NaN where a question was not graded.
+    """
+    if not rows:
+        return np.empty((0, len(question_ids)))
+    submission_ids, question_column_ids, scores = (np.asarray(column) for column in zip(*rows))
+    _, row_index = np.unique(submission_ids, return_inverse=True)
+
+    column_of = {question_id: column for column, question_id in enumerate(question_ids)}
+    column_index = np.array([column_of.get(question_id, -1) for question_id in question_column_ids.tolist()])
+    known = column_index >= 0
+
+    matrix = np.full((row_index.max() + 1, len(question_ids)), np.nan)
+    matrix[row_index[known], column_index[known]] = scores[known].astype(float)
+    return matrix
+
+
+def describe_criterion(rubric: str, criterion_index: int) -> Dict:
+    """
+    Labels a criterion of the rubric with the given fingerprint and gives its text, which is
+    empty for rubrics that are no longer known.
+    """
+    name, known = KNOWN_RUBRICS.get(rubric, (None, None))
+    criteria = {criterion.index: criterion.criteria for criterion in known.criteria} if known else {}
+    if criterion_index not in criteria:
+        return {"label": f"Criterion {criterion_index}", "text": ""}
+    return {"label": f"{name} criterion {criterion_index}", "text": criteria[criterion_index]}
+
+
+def item_discrimination(matrix: np.ndarray) -> np.ndarray:
+    """
+    Corrected item-total correlation of every question, over the submissions graded on every question.
+    NaN for questions every student scored the same on.
+    """
+    complete = matrix[~np.isnan(matrix).any(axis=1)]
+    if len(complete) < 3:
+        return np.full(matrix.shape[1], np.nan)
+
+    rest = complete.sum(axis=1, keepdims=True) - complete
+    item_deviation = complete - complete.mean(axis=0)
+    rest_deviation = rest - rest.mean(axis=0)
+    covariance = (item_deviation * rest_deviation).sum(axis=0)
+    spread = np.sqrt((item_deviation ** 2).sum(axis=0) * (rest_deviation ** 2).sum(axis=0))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.where(spread > 0, covariance / spread, np.nan)
+
+
+def compute_statistics(test_id: int) -> Dict:
+    """Computes the statistics of a test from its stored results."""
+    questions = [q for q in get_questions(test_id) or [] if isinstance(q, dict)]
+    question_ids = [q.get("id") for q in questions]
+    max_scores = np.array([float(q.get("max_score") or 2) for q in questions])
+    obtainable = float(max_scores.sum())
+
+    matrix = score_matrix(get_question_score_rows(test_id) or [], question_ids)
+    graded = ~np.isnan(matrix)
+    counts = graded.sum(axis=0)
+    columns = np.where(graded, matrix, 0.0)
+
+    with np.errstate(invalid="ignore", divide="ignore"):
+        means = np.where(counts > 0, columns.sum(axis=0) / np.maximum(counts, 1), np.nan)
+        deviations = np.where(graded, matrix - means, 0.0)
+        stds = np.where(counts > 1, np.sqrt((deviations ** 2).sum(axis=0) / np.maximum(counts - 1, 1)), np.nan)
+    # nanmedian warns on questions nobody was graded on
+    medians = np.array([np.median(matrix[graded[:, i], i]) if counts[i] else np.nan for i in range(len(question_ids))])
+    difficulty = means / max_scores if len(max_scores) else means
+    discrimination = item_discrimination(matrix)
+
+    # Question score distributions in shares of the max score, all questions at once
+    shares = np.clip(np.nan_to_num(matrix / max_scores), 0, 1)
+    share_bins = np.minimum((shares * QUESTION_SCORE_BINS).astype(int), QUESTION_SCORE_BINS - 1)
+    distributions = np.stack([
+        ((share_bins == b) & graded).sum(axis=0) for b in range(QUESTION_SCORE_BINS)
+    ], axis=1) if len(question_ids) else np.empty((0, QUESTION_SCORE_BINS))
+
+    totals = columns.sum(axis=1)[graded.any(axis=1)]
+    total_counts, total_edges = np.histogram(totals, bins=TOTAL_SCORE_BINS, range=(0, obtainable or 1))
+
+    # (rubric, criterion) -> question -> (evaluations, pass rate)
+    pass_rates = {}
+    for rubric, question_id, criterion_index, evaluations, rate in get_criterion_pass_rates(test_id) or []:
+        pass_rates.setdefault((rubric or "", criterion_index), {})[str(question_id)] = (evaluations, rate)
+
+    return {
+        "submissions_graded": int(len(totals)),
+        "obtainable": round(obtainable, 2),
+        "totals": {
+            "mean": _number(totals.mean()) if len(totals) else None,
+            "median": _number(np.median(totals)) if len(totals) else None,
+            "std": _number(totals.std(ddof=1)) if len(totals) > 1 else None,
+            "min": _number(totals.min()) if len(totals) else None,
+            "max": _number(totals.max()) if len(totals) else None,
+            "histogram": {"counts": total_counts.tolist(), "edges": [round(edge, 2) for edge in total_edges.tolist()]},
+        },
+        "questions": [
+            {
+                "question_id": question_id,
+                "question": questions[i].get("question", ""),
+                "max_score": float(max_scores[i]),
+                "graded": int(counts[i]),
+                "mean": _number(means[i]),
+                "median": _number(medians[i]),
+                "std": _number(stds[i]),
+                "difficulty": _number(difficulty[i]),
+                "discrimination": _number(discrimination[i]),
+                "distribution": distributions[i].tolist(),
+            }
+            for i, question_id in enumerate(question_ids)
+        ],
+        "criteria": {
+            f"{rubric}:{criterion_index}": {
+                "rubric": rubric,
+                "criterion_index": criterion_index,
+                **describe_criterion(rubric, criterion_index),
+                "pass_rate": round(
+                    sum(evaluations * rate for evaluations, rate in by_question.values())
+                    / max(1, sum(evaluations for evaluations, _ in by_question.values())), 3
+                ),
+                "by_question": {
+                    question_id: {"evaluations": evaluations, "pass_rate": round(rate, 3)}
+                    for question_id, (evaluations, rate) in by_question.items()
+                },
+            }
+            for (rubric, criterion_index), by_question in sorted(pass_rates.items())
+        },
+    }
+
+
+def get_statistics(test_id: int) -> Dict:
+    """
+    Returns the statistics of a test, recomputing all of them and storing them first if results
+    were saved since they were last computed.
+    """
+    version, stats_json = get_stored_statistics(test_id)
+    if stats_json:
+        return json.loads(stats_json)
+
+    stats = compute_statistics(test_id)
+    store_statistics(test_id, version, json.dumps(stats))
+    return stats
@@ -1,22 +1,166 @@
+"""
+Result exports.
+
+Results are read from the database with a cursor and written out in batches of
+EXPORT_BATCH_SIZE submissions, so memory use stays bounded however large the
+class is. Every question's score gets its own column. CSV and the PDF summary
+are always available; XLSX needs openpyxl and Parquet needs pyarrow.
+
+Exports can also be written straight to a file:
+
+    python -m modules.export_result TEST_ID --format xlsx --output results.xlsx
+"""
+import argparse
+import csv
+import importlib.util
+import io
+import tempfile
+from itertools import islice
+
 import streamlit as st
-import pandas as pd
-import json
-from fpdf import FPDF
-
-def export_results(results, format_type):
-    df = pd.DataFrame(results, columns=["Student Name", "ID/Matric", "total score", "details"])
-    
-    if format_type == "CSV":
-        csv_data = df.to_csv(index=False).encode("utf-8")
-        st.download_button(label="Download CSV", data=csv_data, file_name="test_results.csv", mime="text/csv")
-    elif format_type == "PDF":
-        pdf = FPDF()
-        pdf.add_page()
-        pdf.set_font("Arial", size=12)
-        pdf.cell(200, 10, "Student Test Results", ln=True, align='C')
-        
-        for _, row in df.iterrows():
-            pdf.cell(200, 10, f"{row['Student Name']} - {row['ID/Matric']} - Score: {row['total score']} - {str(row["details"])}", ln=True)
-        
-        pdf_output = pdf.output(dest='S').encode("latin1")
-        st.download_button(label="Download PDF", data=pdf_output, file_name="test_results.pdf", mime="application/pdf")
+
+from backend.results import iter_result_rows
+from backend.tests import get_questions
+
+EXPORT_BATCH_SIZE = 500
+
+# Exports are spooled in memory up to this size, then to a temporary file
+EXPORT_SPOOL_BYTES = 8 * 1024 * 1024
+
+# format -> (file extension, MIME type, module it needs)
+EXPORT_FORMATS = {
+    "CSV": ("csv", "text/csv", None),
+    "XLSX": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "openpyxl"),
+    "Parquet": ("parquet", "application/vnd.apache.parquet", "pyarrow"),
+    "PDF": ("pdf", "application/pdf", None),
+}
+
+NOT_GRADED = "Not Graded"
+
+
+def available_formats():
+    """The export formats whose optional dependencies are installed."""
+    return [
+        name for name, (_, _, module) in EXPORT_FORMATS.items()
+        if module is None or importlib.util.find_spec(module) is not None
+    ]
+
+
+def export_columns(test_id):
+    """Column headers and the question ID behind each per-question score column."""
+    questions = [q for q in get_questions(test_id) or [] if isinstance(q, dict)]
+    question_ids = [q.get("id") for q in questions]
+    headers = ["Student Name", "ID/Matric", "Total Score"] + [
+        f"Q{q.get('id')} (/{q.get('max_score', 2)})" for q in questions
+    ]
+    return headers, question_ids
+
+
+def iter_export_batches(test_id, question_ids, batch_size=EXPORT_BATCH_SIZE):
+    """Yields lists of flattened rows: name, matric number, total score (None if ungraded), then one score per question."""
+    rows = iter_result_rows(test_id, batch_size)
+    while True:
+        batch = [
+            [full_name or "Unknown", matric_number or "N/A", total_score] + [scores.get(q) for q in question_ids]
+            for full_name, matric_number, total_score, scores in islice(rows, batch_size)
+        ]
+        if not batch:
+            return
+        yield batch
+
+
+def write_csv(test_id, out):
+    """Writes the results as CSV to a binary file object."""
+    headers, question_ids = export_columns(test_id)
+    text = io.TextIOWrapper(out, encoding="utf-8", newline="", write_through=True)
+    writer = csv.writer(text)
+    writer.writerow(headers)
+    for batch in iter_export_batches(test_id, question_ids):
+        writer.writerows(
+            [row[0], row[1], NOT_GRADED if row[2] is None else row[2]] + ["" if score is None else score for score in row[3:]]
+            for row in batch
+        )
+    text.detach()
+
+
+def write_xlsx(test_id, out):
+    """Writes the results as an XLSX workbook; openpyxl's write-only mode streams rows to disk."""
+    from openpyxl import Workbook
+
+    headers, question_ids = export_columns(test_id)
+    workbook = Workbook(write_only=True)
+    sheet = workbook.create_sheet("Results")
+    sheet.append(headers)
+    for batch in iter_export_batches(test_id, question_ids):
+        for row in batch:
+            sheet.append([row[0], row[1], NOT_GRADED if row[2] is None else row[2]] + row[3:])
+    workbook.save(out)
+
+
+def write_parquet(test_id, out):
+    """Writes the results as Parquet, one row group per batch; ungraded scores are null."""
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    headers, question_ids = export_columns(test_id)
+    schema = pa.schema(
+        [pa.field(headers[0], pa.string()), pa.field(headers[1], pa.string())]
+        + [pa.field(header, pa.float64()) for header in headers[2:]]
+    )
+    with pq.ParquetWriter(out, schema) as writer:
+        for batch in iter_export_batches(test_id, question_ids):
+            columns = list(zip(*batch))
+            writer.write_batch(pa.record_batch([pa.array(column, field.type) for column, field in zip(columns, schema)], schema=schema))
+
+
+def write_pdf(test_id, out):
+    """Writes the class summary table as PDF (see modules.report for per-student feedback sheets)."""
+    from modules.report import write_summary_pdf  # Import here to avoid circular imports
+
+    write_summary_pdf(test_id, out)
+
+
+WRITERS = {"CSV": write_csv, "XLSX": write_xlsx, "Parquet": write_parquet, "PDF": write_pdf}
+
+
+def export_to_file(test_id, format_type, out):
+    """Writes a test's results in the given format to a binary file object."""
+    WRITERS[format_type](test_id, out)
+
+
+def export_results(test_id, format_type):
+    """
+    Offers a test's results for download. The export is only generated when the button
+    is clicked, into a temporary file that spills to disk for large classes.
+    """
+    extension, mime, _ = EXPORT_FORMATS[format_type]
+
+    def generate():
+        out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+        export_to_file(test_id, format_type, out)
+        out.seek(0)
+        return out
+
+    st.download_button(
+        label=f"Download {format_type}",
+        data=generate,
+        file_name=f"test_results.{extension}",
+        mime=mime,
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export the results of a test.")
+    parser.add_argument("test_id", type=int)
+    parser.add_argument("--format", choices=[name.lower() for name in EXPORT_FORMATS], default="csv")
+    parser.add_argument("--output", required=True, help="File to write")
+    args = parser.parse_args()
+
+    format_type = next(name for name in EXPORT_FORMATS if name.lower() == args.format)
+    with open(args.output, "wb") as out:
+        export_to_file(args.test_id, format_type, out)
+    print(f"Exported test {args.test_id} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
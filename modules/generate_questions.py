@@ -1,28 +1,95 @@
-import google.generativeai as genai
-from google.ai.generativelanguage_v1beta.types import content
-import json
+"""
+Question generation from course material.
+
+Short material is sent to the LLM in one request. Longer material goes through
+a map-reduce pipeline: the text is split into section-aware chunks, candidate
+questions are generated for every chunk concurrently, and near-duplicates are
+dropped before num_questions are picked round-robin across the chunks so the
+whole document is covered. The number of chunks is capped, so generation time
+stays roughly constant as documents grow. Questions that repeat one already in
+the teacher's question bank are only used when there are too few new ones.
+"""
+import math
 import re
-from dataclasses import dataclass
-from typing import List
-import streamlit as st
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Set
 
+from backend.question_bank import find_banked_questions
 from backend.tests import Question
-
-GEMINI_API_KEY = st.secrets["GEMINI_API_KEY"]
-genai.configure(api_key=GEMINI_API_KEY)
+from modules.llm import get_provider
+from modules.utils.llm_parsing import parse_json_array
+from modules.utils.text_utilities import jaccard_similarity, tokenize
 
 generation_config = {
     "temperature": 1,
-    "max_output_tokens": 8192,
-    "response_mime_type": "text/plain",
+    "max_tokens": 8192,
 }
 
-def generate_questions(num_questions: int, course_material: str) -> List[Question]:
-    model = genai.GenerativeModel(
-        model_name="gemini-1.5-flash",
-        generation_config=generation_config
-    )
+# Chunking: target chunk size, the most chunks (and so requests) per document, and concurrent requests
+GENERATION_CHUNK_CHARS = 12000
+GENERATION_MAX_CHUNKS = 16
+GENERATION_MAX_WORKERS = 8
+
+# Questions whose word sets overlap more than this are considered duplicates
+DUPLICATE_SIMILARITY = 0.6
+
+# "Chapter 3 ...", "2.1 Title" or an ALL CAPS line
+HEADING_PATTERN = re.compile(
+    r"^\s*((?i:chapter|section|part|unit|lecture|module|topic)\b.*|\d+(\.\d+)*\.?\s+[A-Z].*|[A-Z][A-Z0-9 ,:&()-]{3,})\s*$"
+)
+
+def _is_heading(line: str) -> bool:
+    return 0 < len(line.strip()) <= 80 and bool(HEADING_PATTERN.match(line))
 
+def split_sections(text: str) -> List[str]:
+    """Splits text into sections, starting a new one at every line that looks like a heading."""
+    sections, current = [], []
+    for line in text.splitlines(keepends=True):
+        if _is_heading(line) and "".join(current).strip():
+            sections.append("".join(current))
+            current = []
+        current.append(line)
+    if "".join(current).strip():
+        sections.append("".join(current))
+    return sections
+
+def _split_long(section: str, max_chars: int) -> List[str]:
+    """Splits a section that is too long on its own at line boundaries (or mid-line for very long lines)."""
+    pieces, current, size = [], [], 0
+    for part in section.splitlines(keepends=True):
+        while len(part) > max_chars:
+            pieces.append(part[:max_chars])
+            part = part[max_chars:]
+        if current and size + len(part) > max_chars:
+            pieces.append("".join(current))
+            current, size = [], 0
+        current.append(part)
+        size += len(part)
+    if current:
+        pieces.append("".join(current))
+    return pieces
+
+def split_into_chunks(text: str, max_chars: int = GENERATION_CHUNK_CHARS, max_chunks: int = GENERATION_MAX_CHUNKS) -> List[str]:
+    """
+    Packs whole sections into chunks of about max_chars characters. Chunks grow beyond
+    max_chars for very long documents so there are never more than about max_chunks of them.
+    """
+    max_chars = max(max_chars, math.ceil(len(text) / max_chunks))
+    chunks, current, size = [], [], 0
+    for section in split_sections(text):
+        for piece in _split_long(section, max_chars) if len(section) > max_chars else [section]:
+            if current and size + len(piece) > max_chars:
+                chunks.append("".join(current))
+                current, size = [], 0
+            current.append(piece)
+            size += len(piece)
+    if current:
+        chunks.append("".join(current))
+    return chunks
+
+def request_questions(num_questions: int, course_material: str) -> List[Dict]:
+    """Asks the LLM for num_questions questions on the material; returns {"question", "model_answer"} dicts."""
     prompt = f"""
     Given the following course content, generate {num_questions} theory questions that test understanding.
     Return strictly as JSON array:
@@ -36,20 +103,84 @@ def generate_questions(num_questions: int, course_material: str) -> List[Questio
     Course Content: {course_material}
     """
 
-    response = model.generate_content(prompt).text
-    response = re.sub(r"^```json|```$", "", response).strip()
-
-    try:
-        questions_data = json.loads(response)
-        questions = [
-                Question(id=i+1, 
-                        question=q["question"], 
-                        model_answer=q["model_answer"], 
-                        max_score=2.0) 
-                for i, q in enumerate(questions_data)
-            ]
-
-        return questions
-    except json.JSONDecodeError as e:
-        print(f"Error parsing JSON: {e}")
-        return []
+    response = get_provider("generation").complete(
+        [{"role": "user", "content": prompt}],
+        **generation_config
+    )
+    return [
+        q for q in parse_json_array(response)
+        if isinstance(q.get("question"), str) and isinstance(q.get("model_answer"), str)
+    ]
+
+def select_questions(candidates_per_chunk: List[List[Dict]], num_questions: int, banked: Set[str] = frozenset()) -> List[Dict]:
+    """
+    Drops near-duplicate questions, then picks num_questions round-robin across chunks. When fewer
+    questions are still needed than chunks have candidates left, the chunks are sampled evenly.
+    Candidates whose question is in `banked` (see find_banked_questions) count as duplicates too.
+    Duplicates only fill up the selection if there are not enough distinct questions.
+    """
+    seen = []
+    unique_per_chunk = []
+    duplicates = []
+    for candidates in candidates_per_chunk:
+        unique = deque()
+        for candidate in candidates:
+            tokens = set(tokenize(candidate["question"]))
+            if candidate["question"] not in banked and all(jaccard_similarity(tokens, other) <= DUPLICATE_SIMILARITY for other in seen):
+                seen.append(tokens)
+                unique.append(candidate)
+            else:
+                duplicates.append(candidate)
+        unique_per_chunk.append(unique)
+
+    selected = []
+    while len(selected) < num_questions:
+        available = [queue for queue in unique_per_chunk if queue]
+        if not available:
+            break
+        needed = num_questions - len(selected)
+        if needed < len(available):
+            available = [available[j * len(available) // needed] for j in range(needed)]
+        selected.extend(queue.popleft() for queue in available)
+
+    # Rather return similar questions than too few
+    return selected + duplicates[:num_questions - len(selected)]
+
+def generate_questions(num_questions: int, course_material: str, teacher_id: int = None) -> List[Question]:
+    chunks = split_into_chunks(course_material)
+
+    if len(chunks) <= 1:
+        candidates_per_chunk = [request_questions(num_questions, course_material)]
+    else:
+        # Over-generate a little per chunk so there is room to drop duplicates
+        per_chunk = math.ceil(num_questions / len(chunks)) + 1
+        with ThreadPoolExecutor(max_workers=min(GENERATION_MAX_WORKERS, len(chunks))) as executor:
+            futures = [executor.submit(request_questions, per_chunk, chunk) for chunk in chunks]
+            candidates_per_chunk = []
+            for future in futures:
+                try:
+                    candidates_per_chunk.append(future.result())
+                except Exception as e:
+                    print(f"Error generating questions for a chunk: {e}")
+                    candidates_per_chunk.append([])
+
+    banked = set()
+    if teacher_id is not None:
+        try:
+            banked = find_banked_questions(
+                [candidate["question"] for candidates in candidates_per_chunk for candidate in candidates],
+                teacher_id, DUPLICATE_SIMILARITY
+            )
+        except Exception as e:
+            print(f"Could not search the question bank: {e}")
+    questions_data = select_questions(candidates_per_chunk, num_questions, banked)
+
+    if not questions_data:
+        print("No questions could be parsed from the LLM response")
+    return [
+        Question(id=i+1,
+                 question=q["question"],
+                 model_answer=q["model_answer"],
+                 max_score=2.0)
+        for i, q in enumerate(questions_data[:num_questions])
+    ]
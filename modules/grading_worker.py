@@ -0,0 +1,127 @@
+"""
+Grading worker process.
+
+Pulls submissions off the Grading_Job queue, grades them with the LLM and
+stores the results. Run one or more of these alongside the Streamlit app:
+
+    python -m modules.grading_worker --threads 4
+
+Grading modes (--mode):
+    exam          one LLM request for the whole exam (default)
+    per-question  each question as a separate concurrent request
+    stream        one streamed request; results are stored question by question
+"""
+import argparse
+import threading
+import time
+
+from backend.jobs import claim_next_job, fail_job, requeue_stale_jobs
+from backend.results import save_results, save_graded_submissions
+from backend.metrics import prune_spans
+from modules.grading import generate_results, generate_results_per_question, generate_results_stream
+from modules.metrics import span, trace
+from rubric import STRICT_RUBRIC, LENIENT_RUBRIC
+
+GRADING_MODES = ("exam", "per-question", "stream")
+
+
+def grade_submission(test_id: int, student_id: int, strict: bool, mode: str = "exam", batch_size: int = 1):
+    """
+    Grades one submission. Rate limiting and retries of the LLM calls are handled by the provider.
+
+    In stream mode the partial results are saved after every question.
+    """
+    rubric = STRICT_RUBRIC if strict else LENIENT_RUBRIC
+
+    if mode == "per-question":
+        return generate_results_per_question(test_id, student_id, rubric, batch_size=batch_size)
+    if mode == "stream":
+        def save_partial(partial):
+            with span("save_results"):
+                save_results(test_id, student_id, partial)
+
+        return generate_results_stream(test_id, student_id, rubric, on_result=save_partial)
+    return generate_results(test_id, student_id, rubric)
+
+
+def grade_claimed_job(mode: str = "exam", batch_size: int = 1, test_id: int = None):
+    """
+    Claims the next job (optionally for one test) and grades it without saving the result.
+
+    Returns None when the queue is empty, otherwise a (job_id, test_id, student_id, results)
+    tuple. results is None when grading failed; the job has then already been failed or requeued.
+    """
+    job = claim_next_job(test_id)
+    if job is None:
+        return None
+
+    job_id, test_id, student_id, strict = job
+
+    try:
+        with trace(test_id, student_id) as grading_span:
+            raw_results = grade_submission(test_id, student_id, strict, mode, batch_size)
+            if not raw_results:
+                grading_span.status = "error"
+    except Exception as e:
+        print(f"Error grading job {job_id}: {e}")
+        fail_job(job_id, e)
+        return job_id, test_id, student_id, None
+
+    if not raw_results:
+        fail_job(job_id, "No grading results returned")
+        return job_id, test_id, student_id, None
+    return job_id, test_id, student_id, raw_results
+
+
+def process_next_job(mode: str = "exam", batch_size: int = 1, test_id: int = None) -> bool:
+    """
+    Claims, grades and saves a single job; the result and job status are written in one transaction.
+
+    Returns False when there was nothing to do, True otherwise.
+    """
+    graded = grade_claimed_job(mode, batch_size, test_id)
+    if graded is None:
+        return False
+
+    if graded[3]:
+        with span("save_results"):
+            save_graded_submissions([graded])
+    return True
+
+
+def run_worker(poll_interval: float = 2.0, mode: str = "exam", batch_size: int = 1, stop_event: threading.Event = None):
+    """Processes jobs until stop_event is set, sleeping while the queue is empty."""
+    while stop_event is None or not stop_event.is_set():
+        if not process_next_job(mode, batch_size):
+            time.sleep(poll_interval)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run the exam grading worker.")
+    parser.add_argument("--threads", type=int, default=1, help="Number of jobs graded concurrently")
+    parser.add_argument("--poll-interval", type=float, default=2.0, help="Seconds to wait when the queue is empty")
+    parser.add_argument("--stale-minutes", type=int, default=15, help="Requeue running jobs older than this on startup")
+    parser.add_argument("--mode", choices=GRADING_MODES, default="exam", help="How each submission is sent to the LLM")
+    parser.add_argument("--batch-size", type=int, default=1, help="Questions per request in per-question mode")
+    args = parser.parse_args()
+
+    requeue_stale_jobs(args.stale_minutes)
+    prune_spans()
+
+    threads = [
+        threading.Thread(target=run_worker, args=(args.poll_interval, args.mode, args.batch_size), daemon=True)
+        for _ in range(max(1, args.threads))
+    ]
+    for thread in threads:
+        thread.start()
+
+    print(f"Grading worker started with {len(threads)} thread(s).")
+    try:
+        for thread in threads:
+            thread.join()
+    except KeyboardInterrupt:
+        print("Grading worker stopped.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,266 @@
+"""
+LLM provider backends.
+
+The provider used for each purpose is chosen by configuration (environment
+variable or Streamlit secret):
+
+    GRADING_PROVIDER     groq (default), gemini or fake
+    GENERATION_PROVIDER  gemini (default), groq or fake
+
+The fake provider runs in-process and returns well-formed JSON after a
+configurable delay (FAKE_LLM_LATENCY seconds) and fails a configurable share
+of calls (FAKE_LLM_FAILURE_RATE) with a simulated rate-limit error, which
+makes it possible to benchmark and load-test the pipeline offline. It can also
+enforce a simulated provider quota (FAKE_LLM_QUOTA_RPM requests per minute).
+
+Providers returned by get_provider are wrapped in a RateLimitedProvider (see
+modules.rate_limit).
+"""
+import hashlib
+import json
+import random
+import re
+import threading
+import time
+from collections import deque
+from typing import Dict, Iterator, List
+
+from config import get_setting
+from modules.metrics import record_usage
+from modules.rate_limit import RateLimitedProvider, estimate_tokens, get_limiter
+
+
+class ProviderError(Exception):
+    def __init__(self, message: str, status_code: int = None):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class LLMProvider:
+    name = "base"
+    model = None
+
+    def complete(self, messages: List[Dict[str, str]], temperature: float = 0, max_tokens: int = 8192, top_p: float = None) -> str:
+        """Sends a chat-style list of messages and returns the full response text."""
+        raise NotImplementedError
+
+    def stream(self, messages: List[Dict[str, str]], temperature: float = 0, max_tokens: int = 8192, top_p: float = None) -> Iterator[str]:
+        """Yields the response text in chunks as it is generated."""
+        yield self.complete(messages, temperature=temperature, max_tokens=max_tokens, top_p=top_p)
+
+
+class GroqProvider(LLMProvider):
+    name = "groq"
+
+    def __init__(self, model: str = None):
+        from groq import Groq
+
+        self.model = model or get_setting("GROQ_MODEL", "deepseek-r1-distill-llama-70b")
+        self.client = Groq(api_key=get_setting("GROQ_API_KEY"))
+
+    def complete(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        options = {"top_p": top_p} if top_p is not None else {}
+        response = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=False,
+            stop=None,
+            **options,
+        )
+        if response.usage:
+            record_usage(response.usage.prompt_tokens, response.usage.completion_tokens)
+        return response.choices[0].message.content
+
+    def stream(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        options = {"top_p": top_p} if top_p is not None else {}
+        chunks = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            max_tokens=max_tokens,
+            stream=True,
+            stop=None,
+            **options,
+        )
+        for chunk in chunks:
+            # Groq reports usage on the last chunk
+            usage = getattr(getattr(chunk, "x_groq", None), "usage", None)
+            if usage:
+                record_usage(usage.prompt_tokens, usage.completion_tokens)
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+
+
+class GeminiProvider(LLMProvider):
+    name = "gemini"
+
+    def __init__(self, model: str = None):
+        import google.generativeai as genai
+
+        genai.configure(api_key=get_setting("GEMINI_API_KEY"))
+        self.genai = genai
+        self.model = model or get_setting("GEMINI_MODEL", "gemini-1.5-flash")
+
+    def _model(self, temperature, max_tokens, top_p):
+        generation_config = {
+            "temperature": temperature,
+            "max_output_tokens": max_tokens,
+            "response_mime_type": "text/plain",
+        }
+        if top_p is not None:
+            generation_config["top_p"] = top_p
+        return self.genai.GenerativeModel(model_name=self.model, generation_config=generation_config)
+
+    def complete(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        prompt = "\n\n".join(message["content"] for message in messages)
+        response = self._model(temperature, max_tokens, top_p).generate_content(prompt)
+        self._record_usage(response)
+        return response.text
+
+    def stream(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        prompt = "\n\n".join(message["content"] for message in messages)
+        chunk = None
+        for chunk in self._model(temperature, max_tokens, top_p).generate_content(prompt, stream=True):
+            yield chunk.text
+        # The last chunk carries the usage of the whole response
+        if chunk is not None:
+            self._record_usage(chunk)
+
+    @staticmethod
+    def _record_usage(response):
+        usage = getattr(response, "usage_metadata", None)
+        if usage:
+            record_usage(usage.prompt_token_count, usage.candidates_token_count)
+
+
+class FakeProvider(LLMProvider):
+    """
+    Deterministic in-process stand-in for load testing.
+
+    Grading prompts get one evaluation per question ID found in the prompt, and
+    question generation prompts get the requested number of questions.
+    """
+    name = "fake"
+    model = "fake"
+
+    def __init__(self, latency: float = 0.0, failure_rate: float = 0.0, seed: int = 0, quota_rpm: int = 0):
+        self.latency = latency
+        self.failure_rate = failure_rate
+        self.quota_rpm = quota_rpm
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.recent_calls = deque()
+        self.rejected_calls = 0
+
+    def complete(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        prompt = "\n\n".join(message["content"] for message in messages)
+        delay = self._simulate_call()
+        time.sleep(delay)
+        response = self.fake_response(prompt)
+        record_usage(estimate_tokens(prompt), estimate_tokens(response))
+        return response
+
+    def stream(self, messages, temperature=0, max_tokens=8192, top_p=None, chunk_size=16):
+        prompt = "\n\n".join(message["content"] for message in messages)
+        delay = self._simulate_call()
+        response = self.fake_response(prompt)
+        chunks = [response[i:i + chunk_size] for i in range(0, len(response), chunk_size)]
+        for chunk in chunks:
+            time.sleep(delay / len(chunks))
+            yield chunk
+        record_usage(estimate_tokens(prompt), estimate_tokens(response))
+
+    def _simulate_call(self) -> float:
+        """Draws this call's latency, raising a simulated rate-limit error for failed or over-quota calls."""
+        with self.lock:
+            delay = self.latency * self.random.uniform(0.5, 1.5)
+            failed = self.random.random() < self.failure_rate
+            if self.quota_rpm:
+                now = time.monotonic()
+                while self.recent_calls and now - self.recent_calls[0] >= 60:
+                    self.recent_calls.popleft()
+                if len(self.recent_calls) >= self.quota_rpm:
+                    failed = True
+                else:
+                    self.recent_calls.append(now)
+            self.rejected_calls += failed
+        if failed:
+            raise ProviderError("Simulated rate limit from fake provider", status_code=429)
+        return delay
+
+    def fake_response(self, prompt: str) -> str:
+        generate_match = re.search(r"generate (\d+) theory questions", prompt)
+        if generate_match:
+            return self.fake_questions(int(generate_match.group(1)), prompt)
+        return self.fake_grading(prompt)
+
+    @staticmethod
+    def fake_grading(prompt: str) -> str:
+        question_ids = list(dict.fromkeys(int(i) for i in re.findall(r"""["']id["']:\s*(\d+)""", prompt)))
+        results = []
+        for question_id in question_ids:
+            digest = hashlib.sha256(f"{prompt}:{question_id}".encode("utf-8")).digest()
+            results.append({
+                "question_id": question_id,
+                "evaluation": {
+                    str(index): [digest[index] % 2, round(0.5 + (digest[index + 8] % 50) / 100, 2)]
+                    for index in range(1, 4)
+                },
+                "feedback": "Simulated feedback from the fake provider.",
+            })
+        return f"<think>simulated</think>\n```json\n{json.dumps(results)}\n```"
+
+    @staticmethod
+    def fake_questions(num_questions: int, prompt: str) -> str:
+        # Name a few words of the course content so questions on different material differ
+        content = prompt.split("Course Content:", 1)[-1]
+        words = re.findall(r"[A-Za-z]{4,}", content) or ["the", "course"]
+        questions = []
+        for i in range(num_questions):
+            topic = " ".join(words[(i * 5 + j) % len(words)] for j in range(4))
+            questions.append({
+                "question": f"Simulated question {i + 1} on {topic}?",
+                "model_answer": f"Simulated model answer {i + 1} on {topic}.",
+            })
+        return f"```json\n{json.dumps(questions)}\n```"
+
+
+PROVIDERS = {
+    "groq": GroqProvider,
+    "gemini": GeminiProvider,
+    "fake": FakeProvider,
+}
+
+DEFAULT_PROVIDERS = {
+    "grading": "groq",
+    "generation": "gemini",
+}
+
+_providers = {}
+_providers_lock = threading.Lock()
+
+
+def create_provider(name: str) -> LLMProvider:
+    """Instantiates a provider by name, reading its options from configuration."""
+    if name not in PROVIDERS:
+        raise ValueError(f"Unknown LLM provider '{name}'. Choose one of: {', '.join(PROVIDERS)}")
+    if name == "fake":
+        return FakeProvider(
+            latency=get_setting("FAKE_LLM_LATENCY", 0.0, float),
+            failure_rate=get_setting("FAKE_LLM_FAILURE_RATE", 0.0, float),
+            seed=get_setting("FAKE_LLM_SEED", 0, int),
+            quota_rpm=get_setting("FAKE_LLM_QUOTA_RPM", 0, int),
+        )
+    return PROVIDERS[name]()
+
+
+def get_provider(purpose: str) -> LLMProvider:
+    """Returns the (lazily created, shared, rate-limited) provider configured for 'grading' or 'generation'."""
+    with _providers_lock:
+        if purpose not in _providers:
+            name = get_setting(f"{purpose.upper()}_PROVIDER", DEFAULT_PROVIDERS[purpose]).lower()
+            provider = create_provider(name)
+            _providers[purpose] = RateLimitedProvider(provider, get_limiter(provider.name))
+        return _providers[purpose]
@@ -0,0 +1,224 @@
+"""
+Timing spans and token usage for the grading pipeline.
+
+A grading is wrapped in trace(test_id, student_id) and its steps in span(name).
+The spans of a trace are buffered and written to the Metric_Span table in one
+insert when the trace ends; spans outside a trace are written straight away.
+LLM providers report token usage with record_usage(), which is added to the
+innermost open span.
+
+The recorded spans can be exported as Prometheus text:
+
+    python -m modules.metrics                # print once
+    python -m modules.metrics --serve 9108   # serve on http://localhost:9108/metrics
+"""
+import argparse
+import contextvars
+import time
+import uuid
+from collections import defaultdict
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from typing import Dict
+
+import numpy as np
+
+from backend.metrics import get_spans, record_spans
+
+_current_trace = contextvars.ContextVar("metrics_trace", default=None)
+_current_span = contextvars.ContextVar("metrics_span", default=None)
+
+
+class Span:
+    def __init__(self, name: str):
+        self.name = name
+        self.status = "ok"
+        self.prompt_tokens = 0
+        self.completion_tokens = 0
+
+
+class Trace:
+    def __init__(self, test_id: int = None, student_id: int = None):
+        self.id = uuid.uuid4().hex
+        self.test_id = test_id
+        self.student_id = student_id
+        self.rows = []
+
+
+def _flush(rows):
+    """Writes span rows; metrics must never break grading, so errors are only logged."""
+    try:
+        record_spans(rows)
+    except Exception as e:
+        print(f"Could not record metrics: {e}")
+
+
+@contextmanager
+def span(name: str):
+    """Times the enclosed block. Set .status on the yielded span to flag e.g. a 'partial' result."""
+    current = Span(name)
+    token = _current_span.set(current)
+    start = time.perf_counter()
+    try:
+        yield current
+    except BaseException:
+        current.status = "error"
+        raise
+    finally:
+        _current_span.reset(token)
+        duration_ms = (time.perf_counter() - start) * 1000
+        trace_ = _current_trace.get()
+        row = (
+            trace_.id if trace_ else None, name, round(duration_ms, 3), current.status,
+            trace_.test_id if trace_ else None, trace_.student_id if trace_ else None,
+            current.prompt_tokens, current.completion_tokens,
+        )
+        if trace_ is not None:
+            trace_.rows.append(row)
+        else:
+            _flush([row])
+
+
+@contextmanager
+def trace(test_id: int = None, student_id: int = None):
+    """Groups the spans of one grading under a 'grading' span covering the whole block."""
+    current = Trace(test_id, student_id)
+    token = _current_trace.set(current)
+    try:
+        with span("grading") as root:
+            yield root
+    finally:
+        _current_trace.reset(token)
+        _flush(current.rows)
+
+
+def record_usage(prompt_tokens: int, completion_tokens: int):
+    """Adds LLM token usage to the innermost open span, if any."""
+    current = _current_span.get()
+    if current is not None:
+        current.prompt_tokens += int(prompt_tokens or 0)
+        current.completion_tokens += int(completion_tokens or 0)
+
+
+def summarize(since_minutes: int = 1440) -> Dict:
+    """
+    Aggregates the spans of the last `since_minutes` minutes.
+
+    Returns {"exams": {...}, "spans": {name: {...}}} with counts, p50/p95/mean
+    durations in seconds, and tokens per graded exam.
+    """
+    durations = defaultdict(list)
+    statuses = defaultdict(lambda: defaultdict(int))
+    tokens = defaultdict(lambda: [0, 0])
+    traces = set()
+
+    for trace_id, name, duration_ms, status, test_id, prompt_tokens, completion_tokens in get_spans(since_minutes) or []:
+        durations[name].append(duration_ms / 1000)
+        statuses[name][status] += 1
+        if trace_id:
+            tokens[trace_id][0] += prompt_tokens or 0
+            tokens[trace_id][1] += completion_tokens or 0
+            if name == "grading":
+                traces.add(trace_id)
+
+    def stats(values):
+        values = np.asarray(values, dtype=float)
+        if not values.size:
+            return {"count": 0, "p50": 0.0, "p95": 0.0, "mean": 0.0, "sum": 0.0}
+        return {
+            "count": int(values.size),
+            "p50": float(np.percentile(values, 50)),
+            "p95": float(np.percentile(values, 95)),
+            "mean": float(values.mean()),
+            "sum": float(values.sum()),
+        }
+
+    per_exam = [sum(tokens[trace_id]) for trace_id in traces]
+    return {
+        "exams": {
+            "latency": stats(durations.get("grading", [])),
+            "tokens": stats(per_exam),
+            "prompt_tokens": sum(tokens[trace_id][0] for trace_id in traces),
+            "completion_tokens": sum(tokens[trace_id][1] for trace_id in traces),
+        },
+        "spans": {
+            name: dict(stats(values), statuses=dict(statuses[name]))
+            for name, values in sorted(durations.items())
+        },
+    }
+
+
+def prometheus_text(since_minutes: int = 1440) -> str:
+    """
+    Renders the span summary in the Prometheus text exposition format.
+
+    Every value covers the last since_minutes only (and old spans are pruned), so all metrics are
+    gauges; counters would go down as spans leave the window and look like resets to rate().
+    """
+    summary = summarize(since_minutes)
+    window = f"in the last {since_minutes} minutes"
+    lines = [
+        f"# HELP grading_span_duration_seconds Duration quantiles of grading pipeline steps {window}.",
+        "# TYPE grading_span_duration_seconds gauge",
+    ]
+    for name, stats in summary["spans"].items():
+        lines.append(f'grading_span_duration_seconds{{span="{name}",quantile="0.5"}} {stats["p50"]:.6f}')
+        lines.append(f'grading_span_duration_seconds{{span="{name}",quantile="0.95"}} {stats["p95"]:.6f}')
+
+    lines += [
+        f"# HELP grading_spans Grading pipeline steps by outcome {window}.",
+        "# TYPE grading_spans gauge",
+    ]
+    for name, stats in summary["spans"].items():
+        for status, count in sorted(stats["statuses"].items()):
+            lines.append(f'grading_spans{{span="{name}",status="{status}"}} {count}')
+
+    exams = summary["exams"]
+    lines += [
+        f"# HELP grading_llm_tokens LLM tokens used for grading {window}.",
+        "# TYPE grading_llm_tokens gauge",
+        f'grading_llm_tokens{{type="prompt"}} {exams["prompt_tokens"]}',
+        f'grading_llm_tokens{{type="completion"}} {exams["completion_tokens"]}',
+        f"# HELP grading_exam_tokens Quantiles of LLM tokens per graded exam {window}.",
+        "# TYPE grading_exam_tokens gauge",
+        f'grading_exam_tokens{{quantile="0.5"}} {exams["tokens"]["p50"]:.1f}',
+        f'grading_exam_tokens{{quantile="0.95"}} {exams["tokens"]["p95"]:.1f}',
+        f"# HELP grading_exams Exams graded {window}.",
+        "# TYPE grading_exams gauge",
+        f'grading_exams {exams["tokens"]["count"]}',
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def serve(port: int, since_minutes: int = 1440):
+    """Serves prometheus_text() on /metrics until interrupted."""
+    class MetricsHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path.rstrip("/") != "/metrics":
+                self.send_error(404)
+                return
+            body = prometheus_text(since_minutes).encode("utf-8")
+            self.send_response(200)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+    print(f"Serving grading metrics on http://localhost:{port}/metrics")
+    HTTPServer(("", port), MetricsHandler).serve_forever()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Export grading metrics in Prometheus text format.")
+    parser.add_argument("--minutes", type=int, default=1440, help="Only include spans from the last N minutes")
+    parser.add_argument("--serve", type=int, metavar="PORT", help="Serve /metrics over HTTP instead of printing once")
+    args = parser.parse_args()
+
+    if args.serve:
+        serve(args.serve, args.minutes)
+    else:
+        print(prometheus_text(args.minutes), end="")
+
+
+if __name__ == "__main__":
+    main()
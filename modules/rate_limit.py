@@ -0,0 +1,205 @@
+"""
+Client-side rate limiting for LLM calls.
+
+Every call to a provider goes through a RateLimitedProvider, which
+
+- waits for a shared token bucket (requests/min and tokens/min) kept in SQLite,
+  so all Streamlit sessions and worker processes stay under one quota,
+- caps the calls in flight per process with an AIMD controller: the limit grows
+  by one per window of successful calls and halves on a rate-limit response,
+- retries rate-limited calls with jittered exponential backoff, honouring a
+  Retry-After header when the provider sends one.
+
+Quotas are configured per provider, e.g. GROQ_REQUESTS_PER_MINUTE,
+GROQ_TOKENS_PER_MINUTE and GROQ_MAX_CONCURRENCY. Unset quotas are not enforced.
+"""
+import random
+import threading
+import time
+from contextlib import contextmanager
+
+from backend.rate_limit import adjust, try_acquire
+from config import get_setting
+
+RATE_LIMIT_RETRIES = 5
+RATE_LIMIT_BASE_DELAY = 2.0
+RATE_LIMIT_MAX_DELAY = 60.0
+DEFAULT_MAX_CONCURRENCY = 8
+
+# Halve the concurrency limit at most once per this many seconds, so a burst of
+# 429s from calls that were already in flight counts as one overload signal
+DECREASE_COOLDOWN = 2.0
+
+
+def is_rate_limited(error: Exception) -> bool:
+    """Checks whether an LLM client error is an HTTP 429 rate-limit response."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def retry_delay(error: Exception, attempt: int) -> float:
+    """Seconds to wait before retry number attempt + 1: the server's Retry-After, or jittered exponential backoff."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        retry_after = float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        retry_after = 0.0
+
+    delay = min(RATE_LIMIT_MAX_DELAY, RATE_LIMIT_BASE_DELAY * (2 ** attempt))
+    return max(retry_after, random.uniform(delay / 2, delay))
+
+
+def estimate_tokens(text: str) -> int:
+    """
+    Rough token count of a text (about four characters per token), good enough for budgeting.
+    """
+    return (len(text) + 3) // 4
+
+
+class AdaptiveConcurrency:
+    """
+    Additive-increase/multiplicative-decrease limit on the number of calls in flight.
+    """
+
+    def __init__(self, max_limit: int, min_limit: int = 1):
+        self.max_limit = max(1, max_limit)
+        self.min_limit = max(1, min(min_limit, self.max_limit))
+        self.limit = float(self.max_limit)
+        self.in_flight = 0
+        self.last_decrease = 0.0
+        self.condition = threading.Condition()
+
+    @contextmanager
+    def slot(self):
+        """Blocks until a call may start and holds its slot while it runs."""
+        with self.condition:
+            while self.in_flight >= int(self.limit):
+                self.condition.wait()
+            self.in_flight += 1
+        try:
+            yield
+        finally:
+            with self.condition:
+                self.in_flight -= 1
+                self.condition.notify()
+
+    def on_success(self):
+        with self.condition:
+            self.limit = min(self.max_limit, self.limit + 1 / self.limit)
+            self.condition.notify_all()
+
+    def on_overload(self):
+        with self.condition:
+            now = time.monotonic()
+            if now - self.last_decrease >= DECREASE_COOLDOWN:
+                self.limit = max(self.min_limit, self.limit / 2)
+                self.last_decrease = now
+
+
+class RateLimiter:
+    """
+    Shared requests/min and tokens/min buckets plus the per-process concurrency
+    controller for one provider.
+    """
+
+    def __init__(self, name: str, requests_per_minute: float = 0, tokens_per_minute: float = 0,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY):
+        self.name = name
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.concurrency = AdaptiveConcurrency(max_concurrency)
+
+    def reserve(self, tokens: int) -> int:
+        """Waits until the quota allows a call of about `tokens` tokens; returns the tokens reserved."""
+        buckets = []
+        if self.requests_per_minute:
+            buckets.append((f"{self.name}:requests", self.requests_per_minute, 1))
+        if self.tokens_per_minute:
+            buckets.append((f"{self.name}:tokens", self.tokens_per_minute, tokens))
+        if not buckets:
+            return 0
+
+        while True:
+            wait = try_acquire(buckets)
+            if not wait:
+                return tokens
+            time.sleep(wait + random.uniform(0, 0.1))
+
+    def settle(self, reserved: int, used: int):
+        """Gives back the part of a reservation the call did not use, or charges what it used beyond it."""
+        if self.tokens_per_minute:
+            adjust(f"{self.name}:tokens", self.tokens_per_minute, reserved - used)
+
+
+class RateLimitedProvider:
+    """
+    Wraps an LLMProvider so that every call respects the shared quota, the
+    adaptive concurrency limit and retries rate-limit errors.
+    """
+
+    def __init__(self, provider, limiter: RateLimiter):
+        self.provider = provider
+        self.limiter = limiter
+        self.name = provider.name
+        self.model = provider.model
+
+    def complete(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            reserved = self.limiter.reserve(prompt_tokens + max_tokens)
+            with self.limiter.concurrency.slot():
+                try:
+                    response = self.provider.complete(messages, temperature=temperature, max_tokens=max_tokens, top_p=top_p)
+                except Exception as e:
+                    self.limiter.settle(reserved, prompt_tokens)
+                    if not is_rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    self.limiter.concurrency.on_overload()
+                    delay = retry_delay(e, attempt)
+                else:
+                    self.limiter.concurrency.on_success()
+                    self.limiter.settle(reserved, prompt_tokens + estimate_tokens(response or ""))
+                    return response
+            time.sleep(delay)
+
+    def stream(self, messages, temperature=0, max_tokens=8192, top_p=None):
+        """Streams the response; a rate-limited call is only retried if nothing was yielded yet."""
+        prompt_tokens = sum(estimate_tokens(message["content"]) for message in messages)
+
+        for attempt in range(RATE_LIMIT_RETRIES + 1):
+            reserved = self.limiter.reserve(prompt_tokens + max_tokens)
+            completion_chars = 0
+            with self.limiter.concurrency.slot():
+                try:
+                    for chunk in self.provider.stream(messages, temperature=temperature, max_tokens=max_tokens, top_p=top_p):
+                        completion_chars += len(chunk)
+                        yield chunk
+                except Exception as e:
+                    self.limiter.settle(reserved, prompt_tokens + completion_chars // 4)
+                    if completion_chars or not is_rate_limited(e) or attempt == RATE_LIMIT_RETRIES:
+                        raise
+                    self.limiter.concurrency.on_overload()
+                    delay = retry_delay(e, attempt)
+                else:
+                    self.limiter.concurrency.on_success()
+                    self.limiter.settle(reserved, prompt_tokens + completion_chars // 4)
+                    return
+            time.sleep(delay)
+
+
+_limiters = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(name: str) -> RateLimiter:
+    """Returns the process-wide limiter for a provider, configured from {NAME}_REQUESTS_PER_MINUTE etc."""
+    with _limiters_lock:
+        if name not in _limiters:
+            prefix = name.upper()
+            _limiters[name] = RateLimiter(
+                name,
+                requests_per_minute=get_setting(f"{prefix}_REQUESTS_PER_MINUTE", 0, float),
+                tokens_per_minute=get_setting(f"{prefix}_TOKENS_PER_MINUTE", 0, float),
+                max_concurrency=get_setting(f"{prefix}_MAX_CONCURRENCY", DEFAULT_MAX_CONCURRENCY, int),
+            )
+        return _limiters[name]
@@ -0,0 +1,114 @@
+"""
+Bulk re-grading of every submission for a test.
+
+Each submission is queued as a Grading_Job, so a run that is interrupted can be
+resumed: submissions that were already graded stay 'done' and only the
+remaining jobs, including ones that failed or were graded but not yet saved
+when the run stopped, are processed. From the command line:
+
+    python -m modules.regrade 12 --workers 8
+    python -m modules.regrade 12 --resume
+"""
+import argparse
+import sys
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Optional
+
+from backend.jobs import enqueue_test_regrade, get_job_counts, requeue_stale_jobs, resume_test_jobs
+from backend.results import save_graded_submissions
+from modules.grading_worker import grade_claimed_job, GRADING_MODES
+from modules.metrics import span
+
+
+def regrade_test(
+    test_id: int,
+    strict: bool = True,
+    max_workers: int = 4,
+    resume: bool = False,
+    mode: str = "exam",
+    progress_callback: Optional[Callable[[int, int], None]] = None,
+    flush_size: int = 25,
+) -> Dict[str, int]:
+    """
+    Grades (or re-grades) all submissions of a test with at most `max_workers` concurrent gradings.
+
+    With resume=True, jobs left pending or running by an earlier run are continued instead of
+    starting over, and jobs that failed are retried. Do not resume while another run of the same
+    test is still going, as its running jobs would be graded twice.
+    Graded submissions are saved in batches of `flush_size`, one transaction per batch.
+    progress_callback(finished, total) is called from the calling thread after every batch, so it
+    is safe to update Streamlit elements from it. Returns the final job counts by status.
+    """
+    requeue_stale_jobs()
+    counts = get_job_counts(test_id)
+    if not resume or not counts:
+        enqueue_test_regrade(test_id, strict)
+    else:
+        resume_test_jobs(test_id)
+
+    def report():
+        counts = get_job_counts(test_id)
+        if progress_callback:
+            finished = counts.get("done", 0) + counts.get("failed", 0)
+            progress_callback(finished, sum(counts.values()))
+        return counts
+
+    report()
+    max_workers = max(1, max_workers)
+    pending_saves = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = {
+            executor.submit(grade_claimed_job, mode, 1, test_id)
+            for _ in range(max_workers)
+        }
+        while futures:
+            done, futures = wait(futures, return_when=FIRST_COMPLETED)
+            for future in done:
+                try:
+                    graded = future.result()
+                except Exception as e:
+                    print(f"Error processing grading job: {e}")
+                    graded = ()
+                # Keep the slot busy until the test has no pending jobs left
+                if graded is not None:
+                    futures.add(executor.submit(grade_claimed_job, mode, 1, test_id))
+                if graded and graded[3]:
+                    pending_saves.append(graded)
+
+            if len(pending_saves) >= flush_size or not futures:
+                with span("save_results"):
+                    save_graded_submissions(pending_saves)
+                pending_saves = []
+                report()
+
+    return report()
+
+
+def print_progress(finished: int, total: int, width: int = 40):
+    filled = int(width * finished / total) if total else width
+    sys.stdout.write(f"\r[{'#' * filled}{'.' * (width - filled)}] {finished}/{total}")
+    sys.stdout.flush()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Re-grade every submission of a test.")
+    parser.add_argument("test_id", type=int, help="ID of the test to re-grade")
+    parser.add_argument("--workers", type=int, default=4, help="Maximum number of concurrent gradings")
+    parser.add_argument("--lenient", action="store_true", help="Use the lenient rubric instead of the strict one")
+    parser.add_argument("--resume", action="store_true", help="Continue an interrupted run instead of starting over")
+    parser.add_argument("--mode", choices=GRADING_MODES, default="exam", help="How each submission is sent to the LLM")
+    args = parser.parse_args()
+
+    counts = regrade_test(
+        args.test_id,
+        strict=not args.lenient,
+        max_workers=args.workers,
+        resume=args.resume,
+        mode=args.mode,
+        progress_callback=print_progress,
+    )
+    print(f"\nDone: {counts.get('done', 0)} graded, {counts.get('failed', 0)} failed.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,244 @@
+"""
+PDF result reports.
+
+A report is a summary table of the whole class (one row per student, one column
+per question) plus, optionally, a feedback sheet per student with every question,
+the student's answer, the score and the feedback. Feedback sheets are generated
+in a process pool, a batch of students per task with a bounded number of tasks
+in flight, and written into a zip as they complete:
+
+    python -m modules.report TEST_ID --output reports.zip [--workers 4] [--summary-only]
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import re
+import tempfile
+import zipfile
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
+
+from fpdf import FPDF
+
+from backend.results import get_results_summary, iter_submission_details
+from backend.tests import get_questions, get_test_info
+from modules.export_result import EXPORT_BATCH_SIZE, EXPORT_SPOOL_BYTES, NOT_GRADED, export_columns, iter_export_batches
+
+REPORT_MAX_WORKERS = min(8, os.cpu_count() or 1)
+
+# Students per process pool task, and the fewest students worth starting a pool for
+REPORT_BATCH_SIZE = 25
+REPORT_POOL_MIN_STUDENTS = 100
+
+# The built-in PDF fonts only cover Latin-1; map common typographic characters first
+_PDF_REPLACEMENTS = str.maketrans({
+    "‘": "'", "’": "'", "“": '"', "”": '"', "–": "-", "—": "-",
+    "•": "-", "…": "...", " ": " ", "≤": "<=", "≥": ">=", "→": "->",
+})
+
+
+def pdf_text(value) -> str:
+    """Makes any value printable with the built-in PDF fonts."""
+    return str("" if value is None else value).translate(_PDF_REPLACEMENTS).encode("latin-1", "replace").decode("latin-1")
+
+
+def _pdf_bytes(pdf: FPDF) -> bytes:
+    return pdf.output(dest="S").encode("latin-1")
+
+
+class SummaryPDF(FPDF):
+    """Summary table whose title and column headers are repeated on every page."""
+
+    def __init__(self, title, headers, widths, orientation):
+        super().__init__(orientation=orientation)
+        self.report_title = title
+        self.headers = headers
+        self.widths = widths
+        self.set_auto_page_break(True, margin=15)
+
+    def header(self):
+        self.set_font("Arial", "B", 12)
+        self.cell(0, 8, pdf_text(self.report_title), ln=1, align="C")
+        self.set_font("Arial", "B", 8)
+        for header, width in zip(self.headers, self.widths):
+            self.cell(width, 7, pdf_text(header), border=1, align="C")
+        self.ln()
+
+    def footer(self):
+        self.set_y(-12)
+        self.set_font("Arial", "I", 8)
+        self.cell(0, 8, f"Page {self.page_no()}", align="C")
+
+
+def write_summary_pdf(test_id, out):
+    """Writes the class summary table as a PDF to a binary file object."""
+    title, test_code = get_test_info(test_id) or ("Test", "")
+    headers, question_ids = export_columns(test_id)
+    headers = ["#"] + headers
+
+    orientation = "L" if len(question_ids) > 6 else "P"
+    page_width = 277 if orientation == "L" else 190
+    fixed = [10, 60, 35, 22]
+    question_width = max(12, (page_width - sum(fixed)) / max(1, len(question_ids)))
+    widths = fixed + [question_width] * len(question_ids)
+
+    pdf = SummaryPDF(f"{title} ({test_code}) - Results", headers, widths, orientation)
+    pdf.add_page()
+    pdf.set_font("Arial", size=8)
+
+    number = 0
+    for batch in iter_export_batches(test_id, question_ids, EXPORT_BATCH_SIZE):
+        for name, matric_number, total_score, *scores in batch:
+            number += 1
+            values = [number, name, matric_number, NOT_GRADED if total_score is None else total_score]
+            values += ["" if score is None else score for score in scores]
+            for value, width in zip(values, widths):
+                # Long names are cut to the column instead of running into the next one
+                text = pdf_text(value)
+                while text and pdf.get_string_width(text) > width - 2:
+                    text = text[:-1]
+                pdf.cell(width, 6, text, border=1)
+            pdf.ln()
+
+    out.write(_pdf_bytes(pdf))
+
+
+# Set in every pool process by _init_worker, so questions are sent once per process, not per student
+_report_questions = []
+_report_title = ""
+
+
+def _init_worker(questions, title):
+    global _report_questions, _report_title
+    _report_questions = questions
+    _report_title = title
+
+
+def _result_details(result_json):
+    try:
+        result = json.loads(result_json) if result_json else None
+    except json.JSONDecodeError:
+        return {}
+    details = result.get("details", []) if isinstance(result, dict) else result if isinstance(result, list) else []
+    return {str(item.get("question_id")): item for item in details if isinstance(item, dict)}
+
+
+def student_sheet(submission, questions=None, title=None) -> bytes:
+    """Renders one student's feedback sheet as PDF bytes."""
+    questions = _report_questions if questions is None else questions
+    title = _report_title if title is None else title
+    _, full_name, matric_number, answers_json, result_json, total_score = submission
+
+    try:
+        answers = json.loads(answers_json) if answers_json else {}
+    except json.JSONDecodeError:
+        answers = {}
+    details = _result_details(result_json)
+    obtainable = round(sum(q.get("max_score", 2) for q in questions), 2)
+
+    pdf = FPDF()
+    pdf.set_auto_page_break(True, margin=15)
+    pdf.add_page()
+    pdf.set_font("Arial", "B", 14)
+    pdf.multi_cell(0, 8, pdf_text(title), align="C")
+    pdf.set_font("Arial", size=11)
+    pdf.cell(0, 7, pdf_text(f"Student: {full_name or 'Unknown'}    ID/Matric: {matric_number or 'N/A'}"), ln=1)
+    pdf.cell(0, 7, pdf_text(f"Total score: {NOT_GRADED if total_score is None else total_score} / {obtainable}"), ln=1)
+
+    for question in questions:
+        question_id = str(question.get("id"))
+        item = details.get(question_id, {})
+        pdf.ln(3)
+        pdf.set_font("Arial", "B", 11)
+        pdf.multi_cell(0, 6, pdf_text(f"Question {question_id}: {question.get('question', '')}"))
+        pdf.set_font("Arial", size=10)
+        pdf.multi_cell(0, 5, pdf_text(f"Answer: {answers.get(question_id, answers.get(question.get('id'), '')) or 'No answer provided.'}"))
+        pdf.set_font("Arial", "B", 10)
+        pdf.cell(0, 6, pdf_text(f"Score: {item.get('score', NOT_GRADED)} / {question.get('max_score', 2)}"), ln=1)
+        pdf.set_font("Arial", size=10)
+        if item.get("feedback"):
+            pdf.multi_cell(0, 5, pdf_text(item["feedback"]))
+
+    return _pdf_bytes(pdf)
+
+
+def sheet_name(submission) -> str:
+    """File name of a student's feedback sheet; the submission ID keeps names unique."""
+    submission_id, full_name, matric_number = submission[:3]
+    slug = re.sub(r"[^A-Za-z0-9]+", "_", f"{matric_number or ''} {full_name or ''}").strip("_") or "student"
+    return f"students/{submission_id}_{slug}.pdf"
+
+
+def _render_batch(submissions):
+    return [(sheet_name(submission), student_sheet(submission)) for submission in submissions]
+
+
+def iter_student_sheets(test_id, max_workers=REPORT_MAX_WORKERS):
+    """
+    Yields (file name, PDF bytes) for every student of a test, in submission order.
+
+    Large classes are rendered by a process pool, keeping at most a few batches per
+    worker in flight so memory stays bounded.
+    """
+    questions = [q for q in get_questions(test_id) or [] if isinstance(q, dict)]
+    title, test_code = get_test_info(test_id) or ("Test", "")
+    title = f"{title} ({test_code})"
+    submissions = iter_submission_details(test_id)
+    batches = iter(lambda: list(islice(submissions, REPORT_BATCH_SIZE)), [])
+
+    if max_workers <= 1 or (get_results_summary(test_id)[0] or 0) < REPORT_POOL_MIN_STUDENTS:
+        _init_worker(questions, title)
+        for batch in batches:
+            yield from _render_batch(batch)
+        return
+
+    # Spawn rather than fork: reports are also built inside the threaded Streamlit server, and a
+    # forked child can inherit locks (e.g. the connection pool's) held by another thread
+    with ProcessPoolExecutor(
+        max_workers=max_workers, mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker, initargs=(questions, title)
+    ) as executor:
+        pending = deque()
+        for batch in batches:
+            pending.append(executor.submit(_render_batch, batch))
+            if len(pending) >= max_workers * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+
+def write_report_zip(test_id, out, include_students=True, max_workers=REPORT_MAX_WORKERS):
+    """Writes summary.pdf and, optionally, one feedback sheet per student into a zip."""
+    with zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as archive:
+        with archive.open("summary.pdf", "w") as summary:
+            write_summary_pdf(test_id, summary)
+        if include_students:
+            for name, data in iter_student_sheets(test_id, max_workers):
+                archive.writestr(name, data)
+
+
+def report_file(test_id, include_students=True, max_workers=REPORT_MAX_WORKERS):
+    """Generates the report zip into a temporary file (spilling to disk when large), ready to read."""
+    out = tempfile.SpooledTemporaryFile(max_size=EXPORT_SPOOL_BYTES)
+    write_report_zip(test_id, out, include_students, max_workers)
+    out.seek(0)
+    return out
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generate PDF result reports for a test.")
+    parser.add_argument("test_id", type=int)
+    parser.add_argument("--output", required=True, help="Zip file to write")
+    parser.add_argument("--workers", type=int, default=REPORT_MAX_WORKERS, help="Processes rendering feedback sheets")
+    parser.add_argument("--summary-only", action="store_true", help="Only include the class summary table")
+    args = parser.parse_args()
+
+    with open(args.output, "wb") as out:
+        write_report_zip(args.test_id, out, not args.summary_only, args.workers)
+    print(f"Wrote the report for test {args.test_id} to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
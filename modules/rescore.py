@@ -0,0 +1,117 @@
+"""
+Re-scoring of a test from the stored LLM evaluations, without any LLM calls.
+
+Every graded question keeps the model's [binary score, confidence] pair per
+rubric criterion and its feedback, so after a rubric weight change or a switch
+between strict and lenient grading the scores and criteria breakdowns can be
+recomputed locally for the whole cohort at once. Stored evaluations are matched
+to the rubric's criteria by index, so only submissions evaluated against the
+same criteria are re-scored; switching to a rubric with different criteria
+(e.g. strict to lenient) needs a re-grade:
+
+    python -m modules.rescore 12
+    python -m modules.rescore 12 --lenient
+"""
+import argparse
+import sys
+from typing import Dict
+
+import numpy as np
+
+from backend.results import Result, get_stored_evaluations, save_results_many
+from backend.tests import get_questions
+from modules.grading import compose_feedback, format_criterion_feedback
+from modules.scoring import criterion_scores, question_scores, rubric_weights
+from rubric import Rubric, STRICT_RUBRIC, LENIENT_RUBRIC
+
+
+def rescore_test(test_id: int, strict: bool = True, rubric: Rubric = None) -> Dict[str, int]:
+    """
+    Recomputes scores and feedback for every submission of a test that has stored evaluations.
+
+    rubric defaults to the strict or lenient rubric; pass one to try different weights.
+    Submissions graded before evaluations were stored are left untouched and counted as skipped,
+    and so are submissions evaluated against other criteria, counted as mismatched.
+    Returns {"rescored": n, "skipped": m, "mismatched": k}.
+    """
+    rubric = rubric or (STRICT_RUBRIC if strict else LENIENT_RUBRIC)
+    fingerprint = rubric.fingerprint()
+    questions = get_questions(test_id) or []
+    rows = get_stored_evaluations(test_id) or []
+
+    students = sorted({row[0] for row in rows})
+    student_index = {student_id: i for i, student_id in enumerate(students)}
+    question_ids = [q["id"] for q in questions]
+    question_index = {str(question_id): i for i, question_id in enumerate(question_ids)}
+    criterion_index = {criterion.index: i for i, criterion in enumerate(rubric.criteria)}
+
+    shape = (len(students), len(question_ids), len(rubric.criteria))
+    binary = np.zeros(shape)
+    confidence = np.zeros(shape)
+    graded = np.zeros(shape[:2], dtype=bool)
+    evaluated = np.zeros(len(students), dtype=bool)
+    mismatched = np.zeros(len(students), dtype=bool)
+    llm_feedback = {}
+
+    for student_id, question_id, feedback, evaluation_rubric, index, binary_score, confidence_score in rows:
+        s, q = student_index[student_id], question_index.get(str(question_id))
+        if q is None:
+            continue
+        if index is not None and evaluation_rubric != fingerprint:
+            mismatched[s] = True
+            continue
+        graded[s, q] = True
+        llm_feedback[s, q] = feedback or ""
+        if index in criterion_index:
+            binary[s, q, criterion_index[index]] = binary_score
+            confidence[s, q, criterion_index[index]] = confidence_score
+            evaluated[s] = True
+
+    criteria = criterion_scores(binary, confidence, strict)
+    max_scores = np.array([q.get("max_score", 10.0) for q in questions], dtype=float)
+    scores = question_scores(criteria, rubric_weights(rubric), max_scores)
+
+    graded_submissions = []
+    for s, student_id in enumerate(students):
+        if not evaluated[s] or mismatched[s]:
+            continue
+        details = []
+        for q, question in enumerate(questions):
+            if not graded[s, q]:
+                continue
+            criteria_feedback = format_criterion_feedback({}, rubric, strict, criteria[s, q])
+            details.append(Result(
+                question_id=question["id"],
+                score=float(scores[s, q]),
+                feedback=compose_feedback(llm_feedback[s, q], criteria_feedback, question.get("model_answer", "No model answer provided")),
+                evaluation={
+                    str(criterion.index): [int(binary[s, q, c]), float(confidence[s, q, c])]
+                    for c, criterion in enumerate(rubric.criteria)
+                },
+                llm_feedback=llm_feedback[s, q],
+                rubric=fingerprint,
+            ))
+        total = round(sum(float(score) for score in scores[s][graded[s]]), 2)
+        graded_submissions.append((test_id, student_id, {"total_score": total, "details": details}))
+
+    save_results_many(graded_submissions)
+    return {
+        "rescored": len(graded_submissions),
+        "skipped": int((~evaluated & ~mismatched).sum()),
+        "mismatched": int(mismatched.sum()),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Re-score all submissions of a test from stored evaluations.")
+    parser.add_argument("test_id", type=int)
+    parser.add_argument("--lenient", action="store_true", help="Use the lenient rubric instead of the strict one")
+    args = parser.parse_args(argv)
+
+    counts = rescore_test(args.test_id, strict=not args.lenient)
+    print(f"{counts['rescored']} submissions re-scored, {counts['skipped']} skipped (no stored evaluations), "
+          f"{counts['mismatched']} evaluated against a different rubric (re-grade them instead).")
+
+
+if __name__ == "__main__":
+    sys.exit(main())
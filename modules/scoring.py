@@ -0,0 +1,114 @@
+"""
+Vectorized rubric scoring.
+
+LLM evaluations are held as two arrays whose last axis is the rubric criteria:
+binary scores (0 or 1) and confidences (0 to 1). The leading axes are free, e.g.
+(questions,) for one submission or (submissions, questions) for a whole cohort,
+so re-scoring everything after a weight or mode change is a handful of array
+operations and needs no LLM calls.
+"""
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+import numpy as np
+
+from rubric import Rubric
+
+# At or above this confidence the binary assessment is trusted completely
+HIGH_CONFIDENCE = 0.8
+
+# strict -> (weight on binary score, weight on confidence, weight on inverse confidence)
+CONFIDENCE_BLEND = {
+    True: (0.6, 0.4, 0.4),
+    False: (0.3, 0.7, 0.7),
+}
+
+
+def rubric_weights(rubric: Rubric) -> np.ndarray:
+    """Criterion weights in rubric order."""
+    return np.array([criterion.weight for criterion in rubric.criteria], dtype=float)
+
+
+def evaluation_arrays(evaluations: Iterable[Dict[Union[str, int], Tuple[int, float]]], rubric: Rubric) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Converts LLM evaluation dicts ({criterion index: [binary score, confidence]})
+    into (binary, confidence) arrays of shape (evaluations, criteria).
+    Missing or malformed criteria count as [0, 0.0].
+    """
+    rows = []
+    for evaluation in evaluations:
+        evaluation = evaluation if isinstance(evaluation, dict) else {}
+        row = []
+        for criterion in rubric.criteria:
+            pair = evaluation.get(str(criterion.index), evaluation.get(criterion.index, (0, 0.0)))
+            try:
+                binary_score, confidence = pair
+                row.append((int(binary_score), float(confidence)))
+            except (TypeError, ValueError):
+                row.append((0, 0.0))
+        rows.append(row)
+
+    pairs = np.array(rows, dtype=float).reshape(len(rows), len(rubric.criteria), 2)
+    return pairs[..., 0], pairs[..., 1]
+
+
+def criterion_scores(binary: np.ndarray, confidence: np.ndarray, strict: bool) -> np.ndarray:
+    """
+    Blends binary scores with the LLM's confidence, element-wise:
+
+    - confidence >= 0.8: the binary score as is
+    - criterion met: strict 0.6 * binary + 0.4 * confidence, lenient 0.3 * binary + 0.7 * confidence
+    - criterion not met: strict 0.4 * (1 - confidence), lenient 0.7 * (1 - confidence)
+    """
+    binary = np.asarray(binary, dtype=float)
+    confidence = np.asarray(confidence, dtype=float)
+    binary_weight, confidence_weight, inverse_weight = CONFIDENCE_BLEND[bool(strict)]
+
+    blended = np.where(
+        binary == 1,
+        binary_weight * binary + confidence_weight * confidence,
+        inverse_weight * (1 - confidence),
+    )
+    return np.where(confidence >= HIGH_CONFIDENCE, binary, blended)
+
+
+_round_score = np.frompyfunc(lambda value: round(value, 2), 1, 1)
+
+
+def round_scores(values: np.ndarray) -> np.ndarray:
+    """
+    Rounds to 2 decimals exactly like Python's round(); np.round scales by 100 first and so can
+    differ by 0.01 on values near a rounding boundary, which would change stored scores.
+    """
+    return np.array(_round_score(np.asarray(values, dtype=float)), dtype=float)
+
+
+def question_scores(criteria: np.ndarray, weights: np.ndarray, max_scores: np.ndarray) -> np.ndarray:
+    """
+    Weights criterion scores (..., criteria) into question scores (...) scaled by each question's max score.
+
+    The weighted sum is accumulated criterion by criterion, in the same order and with the same
+    rounding as scoring one question at a time, so both give identical scores.
+    """
+    weighted = np.zeros(np.shape(criteria)[:-1])
+    for c, weight in enumerate(weights):
+        weighted = weighted + criteria[..., c] * weight
+    return round_scores(weighted * max_scores)
+
+
+def score_cohort(binary: np.ndarray, confidence: np.ndarray, rubric: Rubric, max_scores: np.ndarray, strict: bool,
+                 graded: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Scores many submissions at once.
+
+    binary and confidence have shape (submissions, questions, criteria) and
+    max_scores shape (questions,). graded is an optional (submissions, questions)
+    mask of questions the LLM actually evaluated; the others score 0.
+    Returns (question scores of shape (submissions, questions), total per submission).
+    """
+    scores = question_scores(criterion_scores(binary, confidence, strict), rubric_weights(rubric), np.asarray(max_scores, dtype=float))
+    if graded is not None:
+        scores = np.where(graded, scores, 0.0)
+    totals = np.zeros(scores.shape[:-1])
+    for q in range(scores.shape[-1]):
+        totals = totals + scores[..., q]
+    return scores, round_scores(totals)
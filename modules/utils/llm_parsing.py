@@ -0,0 +1,157 @@
+import json
+import re
+
+# ================================
+# Parsing of (Streamed) LLM Output
+# ================================
+THINK_OPEN = "<think>"
+THINK_CLOSE = "</think>"
+
+# A ```json fence, which may be left open by a reply that was cut off
+JSON_FENCE_PATTERN = re.compile(r"```json\s*(.*?)(?:```|$)", re.DOTALL)
+# The opening bracket of an array of objects (or an empty array), as opposed to e.g. "questions [1, 2]"
+ARRAY_START_PATTERN = re.compile(r"\[\s*[{\]]")
+
+
+def _partial_tag_length(text, tag):
+    """Length of the longest suffix of text that is a proper prefix of tag."""
+    for length in range(min(len(text), len(tag) - 1), 0, -1):
+        if text.endswith(tag[:length]):
+            return length
+    return 0
+
+
+class ThinkFilter:
+    """
+    Removes <think>...</think> sections from a stream of text chunks on the fly.
+    Tags split across chunk boundaries are handled by holding back a few characters.
+    """
+
+    def __init__(self):
+        self.inside = False
+        self.buffer = ""
+
+    def feed(self, text):
+        """Consumes a chunk and returns the visible text it completes."""
+        self.buffer += text
+        output = []
+        while True:
+            if not self.inside:
+                index = self.buffer.find(THINK_OPEN)
+                if index >= 0:
+                    output.append(self.buffer[:index])
+                    self.buffer = self.buffer[index + len(THINK_OPEN):]
+                    self.inside = True
+                    continue
+                keep = _partial_tag_length(self.buffer, THINK_OPEN)
+                output.append(self.buffer[:len(self.buffer) - keep])
+                self.buffer = self.buffer[len(self.buffer) - keep:]
+                break
+            index = self.buffer.find(THINK_CLOSE)
+            if index >= 0:
+                self.buffer = self.buffer[index + len(THINK_CLOSE):]
+                self.inside = False
+                continue
+            self.buffer = self.buffer[len(self.buffer) - _partial_tag_length(self.buffer, THINK_CLOSE):]
+            break
+        return "".join(output)
+
+    def flush(self):
+        """Returns any held-back visible text at the end of the stream."""
+        remaining = "" if self.inside else self.buffer
+        self.buffer = ""
+        return remaining
+
+
+class JSONArrayStreamParser:
+    """
+    Incrementally parses the first top-level JSON array of objects in a text stream
+    and returns each element object as soon as its closing brace arrives.
+    Anything before the opening bracket (e.g. a ```json fence, or a preamble that
+    mentions "[1, 2]") is ignored: the array starts at the first "[" followed by
+    "{" or "]".
+    """
+
+    def __init__(self):
+        self.started = False
+        self.opening = False  # saw a "[" and waiting for the next non-space character
+        self.finished = False
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.current = []
+
+    def feed(self, text):
+        """Consumes a chunk and returns the list of objects completed by it."""
+        completed = []
+        for char in text:
+            if self.finished:
+                break
+            if not self.started:
+                if self.opening and char.isspace():
+                    continue
+                if not (self.opening and char in "{]"):
+                    self.opening = char == "["
+                    continue
+                # The "[" opened an array of objects; this character is its first token
+                self.started = True
+                self.depth = 1
+
+            if self.depth >= 2:
+                self.current.append(char)
+
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif char == "\\":
+                    self.escape = True
+                elif char == '"':
+                    self.in_string = False
+                continue
+
+            if char == '"':
+                self.in_string = True
+            elif char in "{[":
+                self.depth += 1
+                if self.depth == 2:
+                    self.current = [char]
+            elif char in "}]":
+                self.depth -= 1
+                if self.depth == 1 and char == "}":
+                    try:
+                        item = json.loads("".join(self.current))
+                        if isinstance(item, dict):
+                            completed.append(item)
+                    except json.JSONDecodeError as e:
+                        print("JSON decode error in streamed object:", e)
+                    self.current = []
+                elif self.depth == 0:
+                    self.finished = True
+        return completed
+
+
+def parse_json_array(text):
+    """
+    Returns the objects of the first JSON array of objects in an LLM response.
+
+    <think> sections are dropped, and the contents of a ```json fence are preferred when there is one.
+    The whole array is decoded in one go when it is well formed; otherwise every complete object is
+    salvaged, e.g. from a reply that was cut off before the closing bracket.
+    """
+    think_filter = ThinkFilter()
+    visible = think_filter.feed(text) + think_filter.flush()
+    fence = JSON_FENCE_PATTERN.search(visible)
+    if fence:
+        visible = fence.group(1)
+
+    start = ARRAY_START_PATTERN.search(visible)
+    end = visible.rfind("]")
+    if start and start.start() < end:
+        try:
+            items = json.loads(visible[start.start():end + 1])
+            if isinstance(items, list):
+                return [item for item in items if isinstance(item, dict)]
+        except json.JSONDecodeError:
+            pass
+
+    return JSONArrayStreamParser().feed(visible)
@@ -282,47 +282,102 @@ def display_one_result(questions, student_answers, grading_results):
         else:
             st.info("This exam has not been graded yet.")
 
-def display_results(test_id):
+# Results table: rows per page, and score bands as (lowest, highest) shares of the obtainable score
+RESULTS_PAGE_SIZES = [25, 50, 100, 250]
+SCORE_BANDS = {
+    "All scores": None,
+    "80% and above": (0.8, None),
+    "60% to 79%": (0.6, 0.8),
+    "40% to 59%": (0.4, 0.6),
+    "Below 40%": (None, 0.4),
+    "Not graded": "not graded",
+}
+RESULT_SORT_LABELS = {"Name": "name", "ID/Matric": "matric", "Score": "score", "Submitted": "submitted"}
+
+def display_results(test_id, total_obtainable=None):
     """
-    Displays all student results for the selected test.
-    
-    - Retrieves student results and questions.
-    - Computes total obtainable score.
-    - Displays results in a table with a 'View' button for details.
+    Displays the student results for the selected test one page at a time.
+
+    Sorting, filtering (by name, matric number or score band) and paging are done by the
+    database, so only the rows on screen are loaded and rendered however large the class is.
+    Selecting a row and clicking 'View Details' opens that student's result.
     """
-    from backend.results import get_results_by_id  # Import here to avoid circular imports
+    from backend.results import get_results_page  # Import here to avoid circular imports
     from backend.tests import get_questions
-    
-    student_results = get_results_by_id(test_id)
-    
-    if not student_results:
-        st.warning("No results available for this test.")
-        return
-        
-    questions_json = get_questions(test_id)
-    total_obtainable_score = compute_total_obtainable_score(questions_json) if questions_json else "N/A"
-    
-    st.write("### Student Results")
-    header_cols = st.columns([1, 3, 3, 2, 2])
-    header_cols[0].write("S/N")
-    header_cols[1].write("Full Name")
-    header_cols[2].write("Matric Number")
-    header_cols[3].write(f"Total Score ({total_obtainable_score})")
-    header_cols[4].write("View Details")
-    
-    for i, r in enumerate(student_results):
-        try:
-            full_name, matric_number, result_json, result_id = r
-            row_cols = st.columns([1, 3, 3, 2, 2])
-            row_cols[0].write(i + 1)
-            row_cols[1].write(full_name or "N/A")
-            row_cols[2].write(matric_number or "N/A")
-            
-            score = compute_total_score(result_json)
-            row_cols[3].write(score)
-            
-            if row_cols[4].button("View", key=f"view_{result_id}"):
-                st.session_state.result_id = result_id
-                st.switch_page("pages/student_result.py")
-        except Exception as e:
-            st.error(f"Error displaying result row {i+1}: {e}")
\ No newline at end of file
+
+    if total_obtainable is None:
+        questions_json = get_questions(test_id)
+        total_obtainable = compute_total_obtainable_score(questions_json) if questions_json else "N/A"
+    has_total = isinstance(total_obtainable, (int, float)) and total_obtainable > 0
+
+    filter_cols = st.columns([3, 2, 2, 1])
+    search = filter_cols[0].text_input("Search by name or matric number", key="results_search")
+    band = filter_cols[1].selectbox("Score band", list(SCORE_BANDS) if has_total else ["All scores", "Not graded"], key="results_band")
+    sort_label = filter_cols[2].selectbox("Sort by", list(RESULT_SORT_LABELS), key="results_sort")
+    descending = filter_cols[3].toggle("Descending", value=sort_label == "Score", key=f"results_descending_{sort_label}")
+
+    min_score = max_score = graded = None
+    if SCORE_BANDS[band] == "not graded":
+        graded = False
+    elif SCORE_BANDS[band]:
+        low, high = SCORE_BANDS[band]
+        min_score = low * total_obtainable if low is not None else None
+        max_score = high * total_obtainable if high is not None else None
+
+    # Start from the first page whenever the filters change
+    filters = (test_id, search, band, sort_label, descending)
+    if st.session_state.get("results_filters") != filters:
+        st.session_state.results_filters = filters
+        st.session_state.results_page = 1
+
+    def load_page(page):
+        return get_results_page(
+            test_id, limit=page_size, offset=(page - 1) * page_size, sort=RESULT_SORT_LABELS[sort_label],
+            descending=descending, search=search or None, min_score=min_score, max_score=max_score, graded=graded
+        )
+
+    page_size = st.session_state.get("results_page_size", RESULTS_PAGE_SIZES[0])
+    page = st.session_state.get("results_page", 1)
+    rows, total = load_page(page)
+    page_count = max(1, -(-total // page_size))
+    if page > page_count:
+        # Fewer submissions than when the page was chosen
+        page = st.session_state.results_page = page_count
+        rows, total = load_page(page)
+
+    if not rows:
+        st.info("No results match these filters.")
+    else:
+        score_column = f"Score (/{total_obtainable})"
+        event = st.dataframe(
+            [
+                {
+                    "#": (page - 1) * page_size + i + 1,
+                    "Student Name": full_name or "Unknown",
+                    "ID/Matric": matric_number or "N/A",
+                    score_column: total_score,
+                    "Status": "Graded" if total_score is not None else "Not graded",
+                }
+                for i, (full_name, matric_number, total_score, _) in enumerate(rows)
+            ],
+            hide_index=True,
+            on_select="rerun",
+            selection_mode="single-row",
+            key=f"results_table_{page}",
+            column_config={
+                score_column: st.column_config.ProgressColumn(
+                    score_column, min_value=0, max_value=total_obtainable if has_total else 100, format="%.2f"
+                ),
+            },
+        )
+
+        selected = event.selection.rows
+        if st.button("View Details", disabled=not selected, key="results_view"):
+            st.session_state.result_id = rows[selected[0]][3]
+            st.switch_page("pages/student_result.py")
+
+    page_cols = st.columns([2, 2, 3])
+    page_cols[0].selectbox("Rows per page", RESULTS_PAGE_SIZES, key="results_page_size",
+                           on_change=lambda: st.session_state.update(results_page=1))
+    page_cols[1].number_input("Page", min_value=1, max_value=page_count, key="results_page")
+    page_cols[2].caption(f"{total} submissions, page {page} of {page_count}")
@@ -74,8 +74,8 @@ def save_test_data(teacher_id, test_title, test_description, questions, strict_m
         st.error("An error occurred while saving the test.")
         return False
 
-def handle_pdf_upload(num_questions):
-    """Handle test creation from a PDF file."""
+def handle_pdf_upload(num_questions, teacher_id=None):
+    """Handle test creation from a PDF file. Questions already in the teacher's question bank are avoided."""
     uploaded_file = st.file_uploader("Upload PDF", type=["pdf"])    
     
     if 'last_uploaded_file' not in st.session_state:
@@ -93,7 +93,7 @@ def handle_pdf_upload(num_questions):
             try:
                 with st.spinner("Generating questions..."):
                     content = extract_text_from_pdf(uploaded_file)
-                    questions = generate_questions(num_questions, content)
+                    questions = generate_questions(num_questions, content, teacher_id)
                     st.session_state.questions = questions
                     return questions
             except Exception as e:
@@ -0,0 +1,76 @@
+import re
+from collections import Counter
+from typing import List, Set
+
+STOPWORDS = frozenset("""
+a about above after again against all am an and any are as at be because been before being below between both but by
+can could did do does doing down during each few for from further had has have having he her here hers him his how i
+if in into is it its itself just me more most my no nor not now of off on once only or other our ours out over own
+same she should so some such than that the their theirs them then there these they this those through to too under
+until up very was we were what when where which while who whom why will with would you your yours
+""".split())
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+(?:'[a-z]+)?")
+
+def tokenize(text: str, drop_stopwords: bool = True) -> List[str]:
+    """Lowercased word tokens of a text, optionally without common English stopwords."""
+    tokens = WORD_PATTERN.findall(str(text or "").lower())
+    if drop_stopwords:
+        return [token for token in tokens if token not in STOPWORDS]
+    return tokens
+
+def jaccard_similarity(a: Set[str], b: Set[str]) -> float:
+    """Overlap of two token sets, from 0 (disjoint) to 1 (identical)."""
+    if not a and not b:
+        return 1.0
+    return len(a & b) / len(a | b)
+
+# Model answer features: at most this many key points and key terms per answer
+KEY_POINT_LIMIT = 5
+KEY_TERM_LIMIT = 6
+
+# Words dropped when condensing a key point; they rarely change what an answer must say
+FILLER_WORDS = frozenset("""
+a an the is are was were be been being very really just also that which this these those its their it there
+such quite simply basically generally usually typically
+""".split())
+
+SENTENCE_PATTERN = re.compile(r"(?<=[.!?])\s+|\n+")
+LIST_MARKER_PATTERN = re.compile(r"^\s*(?:[-*•]|\d+[.)])\s+")
+FILLER_PATTERN = re.compile(r"\b(?:" + "|".join(sorted(FILLER_WORDS)) + r")\b\s*", re.IGNORECASE)
+ACRONYM_PATTERN = re.compile(r"\b[A-Z][A-Z0-9]{1,}s?\b")
+
+def split_sentences(text: str) -> List[str]:
+    """Splits text into sentences and list items."""
+    sentences = (LIST_MARKER_PATTERN.sub("", sentence).strip() for sentence in SENTENCE_PATTERN.split(str(text or "")))
+    return [sentence for sentence in sentences if sentence]
+
+def condense(sentence: str) -> str:
+    """Drops filler words and the final full stop, keeping negations and everything with content."""
+    condensed = " ".join(FILLER_PATTERN.sub("", sentence).rstrip(".").split())
+    return condensed[:1].upper() + condensed[1:]
+
+def key_terms(text: str, limit: int = KEY_TERM_LIMIT) -> List[str]:
+    """The most frequent content words of a text, acronyms first, in order of first appearance on ties."""
+    acronyms = list(dict.fromkeys(ACRONYM_PATTERN.findall(str(text or ""))))
+    counts = Counter(token for token in tokenize(text) if len(token) > 2)
+    taken = {acronym.lower() for acronym in acronyms}
+    words = [token for token, _ in counts.most_common() if token not in taken]
+    return (acronyms + words)[:limit]
+
+def key_points(text: str, limit: int = KEY_POINT_LIMIT) -> List[str]:
+    """
+    The sentences of a text that carry most of its content words, condensed and in their
+    original order. Every sentence is scored by how frequent its words are across the whole text.
+    """
+    sentences = split_sentences(text)
+    if len(sentences) > limit:
+        counts = Counter(tokenize(text))
+        scores = [sum(counts[token] for token in set(tokenize(sentence))) for sentence in sentences]
+        best = sorted(range(len(sentences)), key=lambda i: -scores[i])[:limit]
+        sentences = [sentences[i] for i in sorted(best)]
+    return [condense(sentence) for sentence in sentences]
+
+def model_answer_features(model_answer: str) -> dict:
+    """Compact grading reference for a model answer: its key points and key terms."""
+    return {"key_points": key_points(model_answer), "key_terms": key_terms(model_answer)}
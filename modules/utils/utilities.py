@@ -1,36 +1,121 @@
-import fitz  
-from typing import Union
+import fitz
+import hashlib
+import os
+import tempfile
+from typing import Iterator, Union
 from pathlib import Path
 
-def extract_text_from_pdf(pdf_input: Union[str, Path, bytes]) -> str:
+from config import get_setting
+
+# Extracted text is cached on disk keyed by the PDF's SHA-256, evicting the least recently
+# used files once the cache grows beyond PDF_CACHE_MAX_MB
+PDF_CACHE_DIR = Path(get_setting("PDF_CACHE_DIR", ".cache/pdf_text"))
+PDF_CACHE_MAX_BYTES = get_setting("PDF_CACHE_MAX_MB", 200, int) * 1024 * 1024
+HASH_CHUNK_SIZE = 1024 * 1024
+
+def _open_pdf(pdf_input: Union[str, Path, bytes]):
+    if isinstance(pdf_input, (str, Path)):
+        # Handle file path input; pages are read from disk as they are accessed
+        return fitz.open(pdf_input)
+    if isinstance(pdf_input, bytes):
+        # Handle bytes input
+        return fitz.open(stream=pdf_input, filetype="pdf")
+    raise ValueError("Unsupported input type for PDF")
+
+def _pdf_source(pdf_input) -> Union[str, Path, bytes]:
+    """Turns an uploaded file object into bytes without moving its read position; paths and bytes pass through."""
+    if hasattr(pdf_input, 'getvalue'):
+        # Streamlit uploads are in-memory buffers, so this does not copy the file again on every rerun
+        return pdf_input.getvalue()
+    if hasattr(pdf_input, 'read'):
+        return pdf_input.read()
+    return pdf_input
+
+def pdf_content_hash(pdf_input: Union[str, Path, bytes]) -> str:
+    """SHA-256 of the PDF's bytes; files on disk are hashed in chunks."""
+    digest = hashlib.sha256()
+    if isinstance(pdf_input, (str, Path)):
+        with open(pdf_input, "rb") as f:
+            for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b""):
+                digest.update(chunk)
+    else:
+        digest.update(pdf_input)
+    return digest.hexdigest()
+
+def iter_pdf_pages(pdf_input: Union[str, Path, bytes]) -> Iterator[str]:
+    """Yields the text of each page in turn, so only one page is held at a time."""
+    doc = _open_pdf(_pdf_source(pdf_input))
+    try:
+        for page in doc:
+            yield page.get_text()
+    finally:
+        doc.close()
+
+def _read_cached_text(content_hash: str) -> Union[str, None]:
+    path = PDF_CACHE_DIR / f"{content_hash}.txt"
+    try:
+        text = path.read_text(encoding="utf-8")
+        os.utime(path)  # mark as recently used
+        return text
+    except OSError:
+        return None
+
+def _store_cached_text(content_hash: str, text: str):
+    try:
+        PDF_CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        # Write to a temporary file first so concurrent readers never see a partial file
+        fd, temp_path = tempfile.mkstemp(dir=PDF_CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(temp_path, PDF_CACHE_DIR / f"{content_hash}.txt")
+        evict_pdf_cache()
+    except OSError as e:
+        print(f"Could not cache extracted PDF text: {e}")
+
+def evict_pdf_cache(max_bytes: int = None):
+    """Deletes the least recently used cache files until the cache fits in max_bytes."""
+    max_bytes = PDF_CACHE_MAX_BYTES if max_bytes is None else max_bytes
+    entries = []
+    for path in PDF_CACHE_DIR.glob("*.txt"):
+        try:
+            stat = path.stat()
+            entries.append((stat.st_mtime, stat.st_size, path))
+        except OSError:
+            continue
+
+    total = sum(size for _, size, _ in entries)
+    for _, size, path in sorted(entries):
+        if total <= max_bytes:
+            break
+        try:
+            path.unlink()
+            total -= size
+        except OSError:
+            continue
+
+def extract_text_from_pdf(pdf_input: Union[str, Path, bytes], use_cache: bool = True) -> str:
     """
     Extract text from PDF. Accepts either:
     - File path as string or Path object
     - File-like object (from Streamlit uploader)
     - Bytes object
-    
+
+    The text of a PDF is extracted once and then served from the on-disk cache.
+
     Returns: Extracted text as string
     """
     try:
-        if isinstance(pdf_input, (str, Path)):
-            # Handle file path input
-            doc = fitz.open(pdf_input)
-        elif hasattr(pdf_input, 'read'):
-            # Handle uploaded file object
-            doc = fitz.open(stream=pdf_input.read(), filetype="pdf")
-        elif isinstance(pdf_input, bytes):
-            # Handle bytes input
-            doc = fitz.open(stream=pdf_input, filetype="pdf")
-        else:
-            raise ValueError("Unsupported input type for PDF")
-        
-        text = ""
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        source = _pdf_source(pdf_input)
+        content_hash = pdf_content_hash(source) if use_cache else None
+        if content_hash:
+            cached = _read_cached_text(content_hash)
+            if cached is not None:
+                return cached
+
+        text = "".join(iter_pdf_pages(source))
+        if content_hash:
+            _store_cached_text(content_hash, text)
         return text
-        
+
     except Exception as e:
         raise Exception(f"Error processing PDF: {str(e)}")
-
-
@@ -0,0 +1,89 @@
+import streamlit as st
+import pandas as pd
+from backend.tests import get_tests_by_id
+from backend.user import get_user_type_by_id
+from modules.analytics import LOW_DISCRIMINATION, get_statistics
+
+st.title("Test Analytics")
+teacher_id = st.session_state.get("user_id")
+
+if not teacher_id:
+    st.warning("Please [log in](login) first.")
+    st.stop()
+if get_user_type_by_id(teacher_id) != "teacher":
+    st.error("Access denied. Only teachers can view test analytics.")
+    st.stop()
+
+tests = get_tests_by_id(teacher_id)
+if not tests:
+    st.info("You have not created any tests yet.")
+    st.stop()
+
+test_options = {f"{title} ({test_code})": test_id for test_id, test_code, title, _ in tests}
+selected_test_id = test_options[st.selectbox("Select a test", list(test_options))]
+
+stats = get_statistics(selected_test_id)
+totals = stats["totals"]
+
+if not stats["submissions_graded"]:
+    st.info("No submissions have been graded for this test yet.")
+    st.stop()
+
+col1, col2, col3, col4 = st.columns(4)
+col1.metric("Submissions Graded", stats["submissions_graded"])
+col2.metric("Mean Score", f"{totals['mean']} / {stats['obtainable']}")
+col3.metric("Median Score", totals["median"])
+col4.metric("Standard Deviation", totals["std"] if totals["std"] is not None else "-")
+st.caption(f"Scores range from {totals['min']} to {totals['max']}.")
+
+st.subheader("Score Distribution")
+edges = totals["histogram"]["edges"]
+st.bar_chart(
+    pd.DataFrame({
+        "Score": [f"{low:g}-{high:g}" for low, high in zip(edges, edges[1:])],
+        "Students": totals["histogram"]["counts"],
+    }),
+    x="Score",
+    y="Students",
+)
+
+st.subheader("Questions")
+st.caption(
+    "Difficulty is the mean score as a share of the max score (lower is harder). Discrimination is the "
+    f"correlation with the rest of the exam; questions below {LOW_DISCRIMINATION} are flagged for review."
+)
+st.dataframe(
+    pd.DataFrame([
+        {
+            "Question": f"Q{q['question_id']}",
+            "Text": q["question"],
+            "Graded": q["graded"],
+            "Mean": q["mean"],
+            "Median": q["median"],
+            "Std Dev": q["std"],
+            "Difficulty": q["difficulty"],
+            "Discrimination": q["discrimination"],
+            "Review": q["discrimination"] is not None and q["discrimination"] < LOW_DISCRIMINATION,
+        }
+        for q in stats["questions"]
+    ]),
+    hide_index=True,
+    column_config={
+        "Difficulty": st.column_config.ProgressColumn("Difficulty", min_value=0, max_value=1, format="%.2f"),
+        "Review": st.column_config.CheckboxColumn("Review"),
+    },
+)
+
+if stats["criteria"]:
+    st.subheader("Rubric Criteria")
+    criteria = pd.DataFrame([
+        {
+            "Criterion": criterion["label"],
+            "Description": criterion["text"],
+            "Overall": criterion["pass_rate"],
+            **{f"Q{question_id}": rates["pass_rate"] for question_id, rates in criterion["by_question"].items()},
+        }
+        for criterion in stats["criteria"].values()
+    ])
+    st.bar_chart(criteria, x="Criterion", y="Overall")
+    st.dataframe(criteria, hide_index=True)
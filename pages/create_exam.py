@@ -8,6 +8,7 @@ from modules.utils.test_utilities import (
 )
 from backend.user import get_user_type_by_id, get_user_profile_by_email, update_user_info
 from backend.tests import get_tests_by_id, create_test_from_existing
+from backend.question_bank import search_questions
 
 st.title("Create a New Test")
 teacher_id = st.session_state.get("user_id")
@@ -41,7 +42,7 @@ if email:
 
 
 num_questions = st.slider("Number of Questions", min_value=1, max_value=10, value=3)
-test_creation = st.pills("Select Method", ["From PDF", "Manually", "From Existing"], default="From PDF")
+test_creation = st.pills("Select Method", ["From PDF", "Manually", "From Existing", "From Question Bank"], default="From PDF")
 
 if 'updated_questions' not in st.session_state:
     st.session_state.updated_questions = []
@@ -53,7 +54,7 @@ edited_questions = None
 questions = None
 
 if test_creation == "From PDF":
-    questions = handle_pdf_upload(num_questions)
+    questions = handle_pdf_upload(num_questions, teacher_id)
     if questions:
         edited_questions = render_questions(len(questions), questions, "edit")
         st.session_state.edited_questions = edited_questions
@@ -91,6 +92,36 @@ elif test_creation == "From Existing":
     else:
         st.warning("No existing tests found.")
 
+elif test_creation == "From Question Bank":
+    if 'bank_selection' not in st.session_state:
+        st.session_state.bank_selection = {}
+
+    search = st.text_input("Search the question bank", placeholder="e.g. photosynthesis light reaction")
+    only_mine = st.checkbox("Only questions from my tests", value=True)
+
+    if search:
+        matches = search_questions(search, teacher_id=teacher_id if only_mine else None)
+        if not matches:
+            st.info("No matching questions found.")
+        for bank_id, _, question_text, model_answer, max_score, _ in matches:
+            picked = st.checkbox(question_text, value=bank_id in st.session_state.bank_selection, key=f"bank_{bank_id}")
+            if picked:
+                st.session_state.bank_selection[bank_id] = {
+                    "question": question_text,
+                    "model_answer": model_answer,
+                    "max_score": max_score or 2,
+                }
+            else:
+                st.session_state.bank_selection.pop(bank_id, None)
+
+    questions = [
+        dict(question, id=i + 1)
+        for i, question in enumerate(st.session_state.bank_selection.values())
+    ]
+    if questions:
+        st.subheader(f"Selected Questions ({len(questions)})")
+        edited_questions = render_questions(len(questions), questions, "bank")
+
 test_title = st.text_input("Test Title", "" if test_creation != "From Existing" else f"Copy of {st.session_state.test_fields['title']}")
 test_description = st.text_area("Test Description", "" if test_creation != "From Existing" else st.session_state.test_fields["description"])
 strict_mode = st.toggle("Enable Strict Grading")
@@ -110,6 +141,8 @@ if st.button("Save Test"):
                 st.session_state.edited_questions = None
             if "updated_questions" in st.session_state:
                 st.session_state.updated_questions = []
+            if "bank_selection" in st.session_state:
+                st.session_state.bank_selection = {}
 
 
 
@@ -0,0 +1,60 @@
+import streamlit as st
+import pandas as pd
+from backend.user import get_user_type_by_id
+from modules.metrics import summarize, prometheus_text
+
+st.title("Grading Metrics")
+teacher_id = st.session_state.get("user_id")
+
+if not teacher_id:
+    st.warning("Please [log in](login) first.")
+    st.stop()
+if get_user_type_by_id(teacher_id) != "teacher":
+    st.error("Access denied. Only teachers can view grading metrics.")
+    st.stop()
+
+time_windows = {"Last hour": 60, "Last 24 hours": 1440, "Last 7 days": 10080}
+time_window = st.selectbox("Time window", list(time_windows), index=1)
+minutes = time_windows[time_window]
+
+summary = summarize(minutes)
+exams = summary["exams"]
+
+if not exams["latency"]["count"]:
+    st.info("No exams were graded in this time window.")
+else:
+    col1, col2, col3, col4, col5 = st.columns(5)
+    col1.metric("Exams Graded", exams["latency"]["count"])
+    col2.metric("Latency p50", f"{exams['latency']['p50']:.2f}s")
+    col3.metric("Latency p95", f"{exams['latency']['p95']:.2f}s")
+    col4.metric("Tokens per Exam p50", f"{exams['tokens']['p50']:,.0f}")
+    col5.metric("Tokens per Exam p95", f"{exams['tokens']['p95']:,.0f}")
+
+    parse = summary["spans"].get("parse") or summary["spans"].get("llm_request")
+    if parse and parse["count"]:
+        incomplete = parse["statuses"].get("partial", 0) + parse["statuses"].get("error", 0)
+        st.caption(f"{incomplete} of {parse['count']} LLM replies were incomplete or could not be parsed; "
+                   f"{exams['prompt_tokens']:,} prompt and {exams['completion_tokens']:,} completion tokens used in total.")
+
+    st.subheader("Time per Step")
+    st.dataframe(
+        pd.DataFrame([
+            {
+                "Step": name,
+                "Count": stats["count"],
+                "p50 (s)": round(stats["p50"], 3),
+                "p95 (s)": round(stats["p95"], 3),
+                "Mean (s)": round(stats["mean"], 3),
+                "Errors": stats["statuses"].get("error", 0),
+                "Partial": stats["statuses"].get("partial", 0),
+            }
+            for name, stats in summary["spans"].items()
+        ]),
+        hide_index=True,
+        use_container_width=True,
+    )
+
+with st.expander("Prometheus metrics"):
+    metrics_text = prometheus_text(minutes)
+    st.code(metrics_text, language="text")
+    st.download_button("Download", metrics_text, file_name="grading_metrics.prom", mime="text/plain")
@@ -4,6 +4,7 @@ import time
 from backend.user import get_first_name_by_email, get_user_type_by_id
 from backend.results import get_student_results
 from backend.tests import get_questions
+from backend.jobs import get_job_status
 from modules.utils.result_utilities import compute_total_score, display_one_result, compute_total_obtainable_score
 from backend.user import get_first_name_by_email, get_user_profile_by_email
 
@@ -131,6 +132,10 @@ if email:
     # Calculate total obtainable score
     total_obtainable_score = compute_total_obtainable_score(questions)
     
+    # Grading runs in the background; results may arrive question by question
+    job_status = get_job_status(selected_test_id, student_id)
+    grading_in_progress = bool(job_status) and job_status[0] in ("pending", "running")
+    
     # Calculate total score
     if grading_results:
         total_score = compute_total_score(grading_results)
@@ -148,6 +153,9 @@ if email:
         # Add progress bar for visual representation
         st.progress(score_percentage/100)
         st.markdown(f"<p style='text-align: center;'>{score_percentage:.1f}%</p>", unsafe_allow_html=True)
+        
+        if grading_in_progress:
+            st.info("⏳ Grading is still in progress. More questions will appear as they are graded.")
     else:
         st.markdown("""
         <div class="result-card">
@@ -156,6 +164,17 @@ if email:
             </div>
         </div>
         """, unsafe_allow_html=True)
+        
+        # Show the status of the queued grading job, if any
+        if grading_in_progress:
+            st.info("⏳ Your exam is being graded. This page will refresh automatically.")
+    
+    # A failed job may have left the questions graded before the failure in place
+    if job_status and job_status[0] == "failed":
+        if grading_results:
+            st.error("There was an error while grading your exam, so this score may be incomplete. Please contact your lecturer.")
+        else:
+            st.error("There was an error while grading your exam. Please contact your lecturer.")
     
     # Display detailed results
     st.markdown("<h2>Detailed Results</h2>", unsafe_allow_html=True)
@@ -190,4 +209,9 @@ if email:
                             <p>{student_answers.get(q_id, "No answer provided.")}</p>
                         </div>
                     </div>
-                    """, unsafe_allow_html=True)
\ No newline at end of file
+                    """, unsafe_allow_html=True)
+
+    # Poll until the grading worker has stored the result
+    if grading_in_progress:
+        time.sleep(5)
+        st.rerun()
@@ -2,14 +2,14 @@ import streamlit as st
 import json
 import time
 from backend.user import get_first_name_by_email, get_user_type_by_id
-from backend.results import get_results_by_id
+from backend.results import get_results_summary
 from backend.tests import get_questions, get_tests_by_id
-from modules.utils.result_utilities import (
-    compute_total_score, 
-    compute_total_obtainable_score,
-)
+from modules.utils.result_utilities import compute_total_obtainable_score, display_results
 from backend.user import get_first_name_by_email, update_user_info, get_user_profile_by_email
-from modules.export_result import export_results
+from modules.export_result import available_formats, export_results
+from modules.report import report_file
+from modules.regrade import regrade_test
+from modules.rescore import rescore_test
 
 # Custom CSS for better styling
 st.markdown("""
@@ -34,49 +34,6 @@ st.markdown("""
         border-radius: 8px;
         margin-bottom: 1rem;
     }
-    .table-header {
-        background-color: #f0f2f6;
-        padding: 10px 0;
-        border-radius: 5px;
-        margin-bottom: 10px;
-        font-weight: bold;
-    }
-    .table-row {
-        padding: 8px 0;
-        border-bottom: 1px solid #f0f0f0;
-        margin-bottom: 5px;
-    }
-    .table-row:hover {
-        background-color: #f9f9f9;
-    }
-    .score-cell {
-        font-weight: bold;
-        padding: 4px 8px;
-        border-radius: 4px;
-        text-align: center;
-        display: inline-block;
-        min-width: 40px;
-    }
-    .score-high {
-        background-color: #e6f7e6;
-        color: #00a86b;
-    }
-    .score-medium {
-        background-color: #e6f0ff;
-        color: #0068c9;
-    }
-    .score-low {
-        background-color: #fff2e6;
-        color: #ff8c00;
-    }
-    .score-very-low {
-        background-color: #ffe6e6;
-        color: #ff4b4b;
-    }
-    .score-not-graded {
-        background-color: #f0f0f0;
-        color: #666666;
-    }
     .table-container {
         background-color: white;
         padding: 1.5rem;
@@ -174,10 +131,10 @@ if selected_test_id:
             st.error("Test questions not found.")
             st.stop()
         
-        # Get all student results for this test
-        student_results = get_results_by_id(test_id)
+        # Aggregate statistics from the indexed total_score column
+        submissions, graded, average, lowest, highest = get_results_summary(test_id)
         
-        if not student_results:
+        if not submissions:
             st.info("No students have taken this test yet.")
             st.stop()
         
@@ -187,75 +144,69 @@ if selected_test_id:
         # Display results in a styled table
         st.markdown("<h3>Results Summary</h3>", unsafe_allow_html=True)
         
-        # Create a container for the table
+        summary_cols = st.columns(4)
+        summary_cols[0].metric("Graded", f"{graded} / {submissions}")
+        summary_cols[1].metric("Average", average if average is not None else "N/A")
+        summary_cols[2].metric("Lowest", lowest if lowest is not None else "N/A")
+        summary_cols[3].metric("Highest", highest if highest is not None else "N/A")
+        
+        # Only the current page of results is loaded, sorted and filtered by the database
         st.markdown('<div class="table-container">', unsafe_allow_html=True)
+        display_results(test_id, total_obtainable)
+        st.markdown('</div>', unsafe_allow_html=True)
         
-        # Create table header with Streamlit columns
-        cols = st.columns([1, 3, 2, 2, 2])
-        cols[0].markdown('<div class="table-header">#</div>', unsafe_allow_html=True)
-        cols[1].markdown('<div class="table-header">Student Name</div>', unsafe_allow_html=True)
-        cols[2].markdown('<div class="table-header">ID/Matric</div>', unsafe_allow_html=True)
-        cols[3].markdown(f'<div class="table-header">Score (/{total_obtainable})</div>', unsafe_allow_html=True)
-        cols[4].markdown('<div class="table-header">Actions</div>', unsafe_allow_html=True)
+        # Summary table and per-student feedback sheets as PDFs in a zip
+        with st.expander("PDF reports"):
+            include_sheets = st.checkbox("Include a feedback sheet for every student", value=True, key="report_sheets")
+            st.download_button(
+                "Download PDF reports (zip)",
+                data=lambda: report_file(test_id, include_students=include_sheets),
+                file_name=f"{test_code}_reports.zip",
+                mime="application/zip",
+                key="report_download",
+            )
         
-        # Display student results
-        for i, result in enumerate(student_results):
-            try:
-                full_name, matric_number, result_json, result_id = result
-                
-                # Calculate score and determine color class
-                score_class = "score-not-graded"
-                score_display = "Not graded"
-                
-                if result_json:
-                    try:
-                        score = compute_total_score(result_json)
-                        score_display = str(score)
-                        
-                        # Calculate percentage for color coding
-                        if isinstance(total_obtainable, (int, float)) and total_obtainable > 0:
-                            percentage = (score / total_obtainable) * 100
-                            
-                            if percentage >= 80:
-                                score_class = "score-high"
-                            elif percentage >= 60:
-                                score_class = "score-medium"
-                            elif percentage >= 40:
-                                score_class = "score-low"
-                            else:
-                                score_class = "score-very-low"
-                        
-                    except Exception as e:
-                        score_display = "Error"
-                        score_class = "score-not-graded"
+        # Bulk re-grade, e.g. after a model answer or rubric change
+        with st.expander("Re-grade all submissions"):
+            regrade_workers = st.slider("Concurrent gradings", min_value=1, max_value=16, value=4, key="regrade_workers")
+            regrade_strict = st.toggle("Strict grading", value=True, key="regrade_strict")
+            regrade_resume = st.checkbox("Resume the previous re-grade instead of starting over", key="regrade_resume")
+            
+            if st.button("Start Re-grade", key="regrade_button"):
+                progress_bar = st.progress(0.0, text="Queueing submissions...")
                 
-                # Create row with Streamlit columns
-                row = st.columns([1, 3, 2, 2, 2])
-                row[0].markdown(f'<div class="table-row">{i+1}</div>', unsafe_allow_html=True)
-                row[1].markdown(f'<div class="table-row">{full_name or "Unknown"}</div>', unsafe_allow_html=True)
-                row[2].markdown(f'<div class="table-row">{matric_number or "N/A"}</div>', unsafe_allow_html=True)
-                row[3].markdown(f'<div class="table-row"><span class="score-cell {score_class}">{score_display}</span> / {total_obtainable}</div>', unsafe_allow_html=True)
+                def update_progress(finished, total):
+                    progress_bar.progress(finished / total if total else 1.0, text=f"{finished}/{total} submissions graded")
                 
-                # Use Streamlit's native button for the action
-                if row[4].button("View Details", key=f"view_{result_id}"):
-                    # Store the result_id in session state
-                    st.session_state.result_id = result_id
-                    # Redirect to student_result.py page
-                    st.switch_page("pages/student_result.py")
-                
-            except Exception as e:
-                st.error(f"Error displaying result: {str(e)}")
+                counts = regrade_test(
+                    test_id,
+                    strict=regrade_strict,
+                    max_workers=regrade_workers,
+                    resume=regrade_resume,
+                    progress_callback=update_progress,
+                )
+                if counts.get("failed"):
+                    st.warning(f"{counts.get('done', 0)} submissions graded, {counts['failed']} failed. Resume to retry them later.")
+                else:
+                    st.success(f"{counts.get('done', 0)} submissions graded. Refresh the page to see the updated scores.")
         
-        st.markdown('</div>', unsafe_allow_html=True)
+        # Recompute scores from the stored evaluations, e.g. after a rubric weight change
+        with st.expander("Re-score without the LLM"):
+            rescore_strict = st.toggle("Strict grading", value=True, key="rescore_strict")
+            
+            if st.button("Re-score", key="rescore_button"):
+                counts = rescore_test(test_id, strict=rescore_strict)
+                if counts["mismatched"]:
+                    st.warning(f"{counts['rescored']} submissions re-scored. {counts['mismatched']} were graded with the {'lenient' if rescore_strict else 'strict'} rubric, whose criteria differ; re-grade them instead.")
+                elif counts["skipped"]:
+                    st.warning(f"{counts['rescored']} submissions re-scored. {counts['skipped']} were graded before evaluations were stored and need a re-grade instead.")
+                else:
+                    st.success(f"{counts['rescored']} submissions re-scored. Refresh the page to see the updated scores.")
 else:
     st.info("Select a test from the sidebar to view results.")
 
-export_format = st.selectbox("Select export format:", ["CSV", "PDF"], key="export_format")
+export_format = st.selectbox("Select export format:", available_formats(), key="export_format")
 
-student_results_for_export = [
-    (full_name, matric_number, compute_total_score(result_json) if result_json else "Not Graded", result_json)
-    for full_name, matric_number, result_json, result_id in student_results
-]
-
-if st.button("Export Results"):
-    export_results(student_results_for_export, export_format)
+if selected_test_id:
+    # Rows are streamed from the database when the download is clicked
+    export_results(selected_test_id, export_format)
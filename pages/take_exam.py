@@ -1,10 +1,7 @@
 import streamlit as st
 import json
 
-from modules.grading import generate_results
-from rubric import STRICT_RUBRIC, LENIENT_RUBRIC
 from backend.tests import get_test_data, check_previous_attempt, save_student_answers 
-from backend.results import save_results
 
 # Custom CSS for better styling
 st.markdown("""
@@ -174,33 +171,15 @@ if st.session_state.exam_fetched:
     
     if submit_button:
         with st.spinner("Processing your submission..."):
-            save_student_answers(st.session_state.test_id, student_id, st.session_state.student_answers)
+            save_student_answers(st.session_state.test_id, student_id, st.session_state.student_answers, strict=True)
             
             st.markdown("""
-            <div class="info-box">
-                <strong>⏳ Grading in Progress</strong><br>
-                Please wait while we grade your exam...
+            <div class="success-box">
+                <strong>✅ Exam Submitted Successfully</strong><br>
+                Your exam has been queued for grading. Redirecting to results...
             </div>
             """, unsafe_allow_html=True)
             
-            raw_results = generate_results(st.session_state.test_id, student_id, STRICT_RUBRIC)
-            if raw_results:
-                save_results(st.session_state.test_id, student_id, raw_results)
-                
-                st.markdown("""
-                <div class="success-box">
-                    <strong>✅ Exam Submitted Successfully</strong><br>
-                    Your exam has been graded. Redirecting to results...
-                </div>
-                """, unsafe_allow_html=True)
-                
-                st.session_state.test_id = st.session_state.test_id
-                st.session_state.student_id = student_id
-                st.switch_page("pages/result.py")
-            else:
-                st.markdown("""
-                <div class="error-box">
-                    <strong>⚠️ Grading Error</strong><br>
-                    There was an error while grading your exam. Please try again later.
-                </div>
-                """, unsafe_allow_html=True)
\ No newline at end of file
+            st.session_state.test_id = st.session_state.test_id
+            st.session_state.student_id = student_id
+            st.switch_page("pages/result.py")
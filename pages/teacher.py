@@ -219,8 +219,8 @@ if email:
             # Quick actions section
             st.markdown("<h2 style='margin-top: 2rem; margin-bottom: 1rem;'>Quick Actions</h2>", unsafe_allow_html=True)
             
-            # Action buttons in a 2-column layout
-            action_col1, action_col2 = st.columns(2)
+            # Action buttons in a 4-column layout
+            action_col1, action_col2, action_col3, action_col4 = st.columns(4)
             
             with action_col1:
                 if st.button("Create New Exam", key="create_exam"):
@@ -229,6 +229,14 @@ if email:
             with action_col2:
                 if st.button("View Results", key="view_results"):
                     st.switch_page("pages/results.py")
+                    
+            with action_col3:
+                if st.button("Grading Metrics", key="grading_metrics"):
+                    st.switch_page("pages/metrics.py")
+
+            with action_col4:
+                if st.button("Test Analytics", key="test_analytics"):
+                    st.switch_page("pages/analytics.py")
             
             # Recent activity section
             st.markdown("<h2 style='margin-top: 2rem; margin-bottom: 1rem;'>Recent Activity</h2>", unsafe_allow_html=True)
@@ -1,3 +1,4 @@
+import hashlib
 from pydantic import BaseModel, validator
 from typing import List
 
@@ -17,6 +18,11 @@ class Rubric(BaseModel):
             raise ValueError(f"Sum of criterion weights must equal 1.0, got {total_weight}")
         return v
 
+    def fingerprint(self) -> str:
+        """Identifies the criteria evaluations are made against; weights are left out, so re-weighting keeps it."""
+        criteria = "\n".join(f"{c.index}:{c.criteria}" for c in sorted(self.criteria, key=lambda c: c.index))
+        return hashlib.sha256(criteria.encode("utf-8")).hexdigest()[:16]
+
 # Hard coded variables
 LENIENT_RUBRIC = Rubric(criteria=[
     RubricCriterion(index=1, criteria="Has solid ideas relevant to every part of the question in a well explained manner.", weight=0.5),
@@ -0,0 +1,33 @@
+from modules.utils.llm_parsing import JSONArrayStreamParser, ThinkFilter, parse_json_array
+
+EVALUATIONS = '[{"question_id": 1, "evaluation": {"1": [1, 0.9]}, "feedback": "Good [see notes]."}, {"question_id": 2, "evaluation": {"1": [0, 0.8]}, "feedback": "Missing."}]'
+
+
+def stream(text, chunk_size=7):
+    think_filter, parser, items = ThinkFilter(), JSONArrayStreamParser(), []
+    for i in range(0, len(text), chunk_size):
+        items += parser.feed(think_filter.feed(text[i:i + chunk_size]))
+    return items + parser.feed(think_filter.flush())
+
+
+def test_preamble_with_brackets_before_fence():
+    reply = f"<think>[draft]</think>Evaluations for questions [1, 2] below:\n```json\n{EVALUATIONS}\n```"
+    assert [item["question_id"] for item in parse_json_array(reply)] == [1, 2]
+    assert [item["question_id"] for item in stream(reply)] == [1, 2]
+
+
+def test_preamble_with_brackets_without_fence():
+    reply = f"Evaluations for questions [1, 2]: {EVALUATIONS}"
+    assert [item["question_id"] for item in parse_json_array(reply)] == [1, 2]
+    assert [item["question_id"] for item in stream(reply)] == [1, 2]
+
+
+def test_truncated_reply_salvages_complete_objects():
+    reply = f"Questions [1, 2]:\n```json\n{EVALUATIONS[:-30]}"
+    assert [item["question_id"] for item in parse_json_array(reply)] == [1]
+    assert [item["question_id"] for item in stream(reply)] == [1]
+
+
+def test_empty_array():
+    assert parse_json_array("```json\n[ ]\n```") == []
+    assert stream("Nothing to grade [none]: []") == []
@@ -0,0 +1,67 @@
+import pytest
+
+import backend
+import backend.rate_limit
+import modules.rate_limit
+from modules.rate_limit import RateLimiter
+
+
+class Clock:
+    """Stands in for the time module so waits are recorded instead of slept."""
+
+    def __init__(self):
+        self.now = 1_000_000.0
+        self.slept = 0.0
+
+    def time(self):
+        return self.now
+
+    def monotonic(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept += seconds
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(tmp_path, monkeypatch):
+    monkeypatch.setattr(backend, "DATABASE", str(tmp_path / "rate_limit.db"))
+    monkeypatch.setattr(backend, "_pool", None)
+    conn = backend.get_db_connection()
+    conn.execute("CREATE TABLE Rate_Limit (bucket TEXT PRIMARY KEY, tokens REAL NOT NULL, updated_at REAL NOT NULL)")
+    conn.commit()
+    conn.close()
+
+    clock = Clock()
+    monkeypatch.setattr(backend.rate_limit, "time", clock)
+    monkeypatch.setattr(modules.rate_limit, "time", clock)
+    monkeypatch.setattr(modules.rate_limit.random, "uniform", lambda low, high: 0.0)
+    yield clock
+    monkeypatch.setattr(backend, "_pool", None)
+
+
+def test_call_above_capacity_is_reserved_in_full(clock):
+    # 6000 tokens/min refills 100 tokens/s into a bucket of 1000
+    limiter = RateLimiter("test", tokens_per_minute=6000)
+    assert limiter.reserve(1500) == 1500
+    assert clock.slept == 0
+
+    limiter.reserve(100)
+    assert clock.slept == pytest.approx(6.0)
+
+
+def test_overage_is_charged_on_settle(clock):
+    limiter = RateLimiter("test", tokens_per_minute=6000)
+    limiter.settle(limiter.reserve(1000), 1500)
+
+    limiter.reserve(100)
+    assert clock.slept == pytest.approx(6.0)
+
+
+def test_unused_reservation_is_refunded(clock):
+    limiter = RateLimiter("test", tokens_per_minute=6000)
+    limiter.settle(limiter.reserve(1000), 200)
+
+    limiter.reserve(800)
+    assert clock.slept == 0
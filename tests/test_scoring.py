@@ -0,0 +1,67 @@
+import itertools
+
+import numpy as np
+
+from modules.scoring import criterion_scores, question_scores, rubric_weights, score_cohort
+from rubric import LENIENT_RUBRIC, STRICT_RUBRIC
+
+CONFIDENCES = [round(0.05 * i, 2) for i in range(21)]
+MAX_SCORES = [1.0, 2.0, 3.0, 5.0, 10.0]
+
+
+def scalar_question_score(evaluation, rubric, strict, max_score):
+    """Scores one question one criterion at a time, as grading did before scoring was vectorized."""
+    final_score = 0.0
+    for criterion in rubric.criteria:
+        binary_score, confidence = evaluation[str(criterion.index)]
+        if confidence >= 0.8:
+            criterion_score = binary_score
+        elif binary_score == 1:
+            criterion_score = 0.6 * binary_score + 0.4 * confidence if strict else 0.3 * binary_score + 0.7 * confidence
+        else:
+            criterion_score = 0.4 * (1 - confidence) if strict else 0.7 * (1 - confidence)
+        final_score += criterion_score * criterion.weight
+    return round(final_score * max_score, 2)
+
+
+def evaluation_grid():
+    for binary in itertools.product((0, 1), repeat=3):
+        for confidence in itertools.product(CONFIDENCES, repeat=3):
+            yield binary, confidence
+
+
+def test_question_scores_match_scalar_scoring():
+    for rubric, strict in ((STRICT_RUBRIC, True), (LENIENT_RUBRIC, False)):
+        grid = list(evaluation_grid())
+        binary = np.array([b for b, _ in grid], dtype=float)
+        confidence = np.array([c for _, c in grid])
+        criteria = criterion_scores(binary, confidence, strict)
+        for max_score in MAX_SCORES:
+            scores = question_scores(criteria, rubric_weights(rubric), max_score)
+            expected = [
+                scalar_question_score({str(i + 1): [b[i], c[i]] for i in range(3)}, rubric, strict, max_score)
+                for b, c in grid
+            ]
+            assert scores.tolist() == expected
+
+
+def test_boundary_value_rounds_like_python():
+    # 0.7 * 0.5 * 0.3 + 0.7 * 1.0 * 0.2 + 0.7 * 1.0 * 0.5 lies just below 0.595
+    criteria = criterion_scores(np.array([0.0, 0.0, 0.0]), np.array([0.0, 0.0, 0.5]), False)
+    assert float(question_scores(criteria, rubric_weights(LENIENT_RUBRIC), 1.0)) == 0.59
+
+
+def test_cohort_totals_match_per_question_sums():
+    rng = np.random.default_rng(0)
+    binary = rng.integers(0, 2, size=(200, 12, 3)).astype(float)
+    confidence = rng.choice(CONFIDENCES, size=(200, 12, 3))
+    max_scores = rng.choice(MAX_SCORES, size=12)
+    scores, totals = score_cohort(binary, confidence, STRICT_RUBRIC, max_scores, True)
+    for s in range(len(scores)):
+        total = 0.0
+        for q in range(scores.shape[1]):
+            evaluation = {str(c + 1): [binary[s, q, c], confidence[s, q, c]] for c in range(3)}
+            score = scalar_question_score(evaluation, STRICT_RUBRIC, True, max_scores[q])
+            assert scores[s, q] == score
+            total += score
+        assert totals[s] == round(total, 2)